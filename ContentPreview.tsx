@@ -1,8 +1,9 @@
 'use client'
 
-import { useState } from 'react'
+import { useEffect, useRef, useState } from 'react'
 import { Calendar, Link2 } from 'lucide-react'
 import { cn } from "@/lib/utils"
+import { Button } from "@/components/ui/button"
 import { Tabs, TabsList, TabsTrigger, TabsContent } from "@/components/ui/tabs"
 
 interface ContentPreviewProps {
@@ -13,15 +14,69 @@ interface ContentPreviewProps {
     date: string
   }
   onTranslate: () => Promise<{ title: string; body: string }>
+  // body holds only the first chunk; the rest is fetched from /api/content/:id/chunks/:n on scroll
+  contentId?: number
+  chunkCount?: number
 }
 
-export default function ContentPreview({ content, onTranslate }: ContentPreviewProps) {
+export default function ContentPreview({ content, onTranslate, contentId, chunkCount = 1 }: ContentPreviewProps) {
   const [viewMode, setViewMode] = useState<'original' | 'translated' | 'both'>('original')
   const [isTranslated, setIsTranslated] = useState(false)
   const [translatedContent, setTranslatedContent] = useState<{
     title: string;
     body: string;
   } | null>(null)
+  const [loadedChunks, setLoadedChunks] = useState<string[]>([])
+  const [chunkError, setChunkError] = useState<string | null>(null)
+  const isLoadingChunk = useRef(false)
+  const sentinelRef = useRef<HTMLDivElement | null>(null)
+
+  const hasMoreChunks = contentId !== undefined && 1 + loadedChunks.length < chunkCount
+
+  // Reset loaded chunks when a new article is shown
+  useEffect(() => {
+    setLoadedChunks([])
+    setChunkError(null)
+  }, [contentId, content.body])
+
+  // Re-armed after every loaded chunk, so loading continues while the sentinel stays visible.
+  // After a failure it stays disarmed until the user retries.
+  useEffect(() => {
+    const sentinel = sentinelRef.current
+    if (!sentinel || !hasMoreChunks || chunkError) return
+
+    let cancelled = false
+    const observer = new IntersectionObserver(async (entries) => {
+      if (!entries.some(entry => entry.isIntersecting) || isLoadingChunk.current) return
+      observer.disconnect()
+      isLoadingChunk.current = true
+      try {
+        const index = 1 + loadedChunks.length
+        const response = await fetch(`/api/content/${contentId}/chunks/${index}`)
+        const data = await response.json()
+        if (!response.ok || data.status === 'error') {
+          throw new Error(data.message || 'Failed to load content')
+        }
+        if (!cancelled) setLoadedChunks(prev => [...prev, data.data.html])
+      } catch (error) {
+        console.error('Error loading content chunk:', error)
+        if (!cancelled) setChunkError(error instanceof Error ? error.message : String(error))
+      } finally {
+        isLoadingChunk.current = false
+      }
+    }, { rootMargin: '600px 0px' })
+
+    observer.observe(sentinel)
+    return () => {
+      cancelled = true
+      observer.disconnect()
+    }
+  }, [contentId, hasMoreChunks, chunkError, loadedChunks.length])
+
+  const originalContent = {
+    title: content.title,
+    body: content.body + loadedChunks.join('')
+  }
 
   const handleTabChange = async (value: string) => {
     if ((value === 'translated' || value === 'both') && !isTranslated) {
@@ -79,7 +134,21 @@ export default function ContentPreview({ content, onTranslate }: ContentPreviewP
 
         <TabsContent value="original">
           <div className="w-full">
-            {renderContent(content, false)}
+            {renderContent(originalContent, false)}
+            {hasMoreChunks && (
+              <div ref={sentinelRef} className="py-4 text-center text-muted-foreground">
+                {chunkError ? (
+                  <>
+                    続きを読み込めませんでした
+                    <Button type="button" variant="outline" size="sm" className="ml-2" onClick={() => setChunkError(null)}>
+                      再試行
+                    </Button>
+                  </>
+                ) : (
+                  '続きを読み込み中...'
+                )}
+              </div>
+            )}
           </div>
         </TabsContent>
 
@@ -98,7 +167,7 @@ export default function ContentPreview({ content, onTranslate }: ContentPreviewP
         <TabsContent value="both">
           <div className="flex flex-col w-full">
             <div className="w-full mb-8">
-              {renderContent(content, false)}
+              {renderContent(originalContent, false)}
             </div>
             <div className="w-full">
               {isTranslated && translatedContent ? (
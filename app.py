@@ -36,33 +36,25 @@ os.makedirs(os.path.join(app.static_folder, 'js'), exist_ok=True)
 # Configuration
 app.config['SECRET_KEY'] = os.environ.get('FLASK_SECRET_KEY', 'dev_key')
 
-# Database configuration
-database_url = os.environ.get('DATABASE_URL')
-if not database_url:
-    logger.error("DATABASE_URL is not set")
-    raise ValueError("DATABASE_URL environment variable is required")
-
-if database_url.startswith('postgres://'):
-    database_url = database_url.replace('postgres://', 'postgresql://', 1)
+# Database configuration (embedded SQLite when DATABASE_URL is not set)
+from services.database import resolve_database_url, engine_options
+database_url = resolve_database_url()
 
 app.config['SQLALCHEMY_DATABASE_URI'] = database_url
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-    'pool_recycle': 300,
-    'pool_pre_ping': True,
-    'pool_timeout': 30,
-    'pool_size': 10,
-    'max_overflow': 5
-}
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(database_url)
 
 # Initialize database
-from models import db
+from models import db, upgrade_schema
 db.init_app(app)
 
 # Import routes after app initialization
 with app.app_context():
     from routes import register_routes
     register_routes(app)
+
+    from commands import register_commands
+    register_commands(app)
     
     try:
         # Test database connection
@@ -71,6 +63,7 @@ with app.app_context():
         
         # Create database tables
         db.create_all()
+        upgrade_schema()
         logger.info('Database tables created successfully')
     except Exception as e:
         logger.error(f'Error during database setup: {str(e)}')
@@ -0,0 +1,94 @@
+"""
+Benchmark near-duplicate lookups against a populated LSH index.
+
+Inserts N synthetic articles (random signatures, plus a planted near-duplicate
+for every query) and reports query latency percentiles.
+
+    DATABASE_URL=sqlite:////tmp/lsh_bench.db python benchmarks/lsh_query.py --articles 100000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite:////tmp/lsh_bench.db')
+
+from sqlalchemy import insert  # noqa: E402
+from app import app  # noqa: E402
+from models import MinHashBucket, ScrapedContent, db  # noqa: E402
+from services.minhash import (  # noqa: E402
+    NUM_PERM, band_keys, pack_signature, unpack_signature, find_near_duplicates
+)
+
+INSERT_BATCH = 5000
+
+
+def random_signature(rng: random.Random):
+    return [rng.getrandbits(32) for _ in range(NUM_PERM)]
+
+
+def mutate(signature, rng: random.Random, similarity: float):
+    return [value if rng.random() < similarity else rng.getrandbits(32) for value in signature]
+
+
+def populate(articles: int, rng: random.Random):
+    next_id = (db.session.query(db.func.max(ScrapedContent.id)).scalar() or 0) + 1
+    started = time.perf_counter()
+    for start in range(0, articles, INSERT_BATCH):
+        contents, buckets = [], []
+        for content_id in range(next_id + start, next_id + min(start + INSERT_BATCH, articles)):
+            signature = random_signature(rng)
+            contents.append({
+                'id': content_id,
+                'url': f'https://bench.example/{content_id}',
+                'title': f'bench {content_id}',
+                'minhash': pack_signature(signature)
+            })
+            buckets.extend({'bucket': key, 'content_id': content_id} for key in set(band_keys(signature)))
+        db.session.execute(insert(ScrapedContent), contents)
+        db.session.execute(insert(MinHashBucket), buckets)
+        db.session.commit()
+        print(f'  inserted {min(start + INSERT_BATCH, articles)}/{articles}', end='\r')
+    print(f'\nPopulated {articles} articles in {time.perf_counter() - started:.1f}s')
+    return next_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--articles', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--similarity', type=float, default=0.9, help='similarity of planted duplicates')
+    parser.add_argument('--skip-populate', action='store_true', help='reuse rows from a previous run')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with app.app_context():
+        first_id = db.session.query(db.func.min(ScrapedContent.id)).scalar()
+        if not args.skip_populate:
+            first_id = populate(args.articles, rng)
+        total = db.session.query(db.func.count(MinHashBucket.content_id.distinct())).scalar()
+        print(f'Index size: {total} articles')
+
+        latencies, found = [], 0
+        for _ in range(args.queries):
+            target_id = rng.randrange(first_id, first_id + args.articles)
+            packed = db.session.get(ScrapedContent, target_id).minhash
+            db.session.expunge_all()
+            query_signature = mutate(unpack_signature(packed), rng, args.similarity)
+
+            started = time.perf_counter()
+            matches = find_near_duplicates(query_signature, threshold=args.similarity - 0.1)
+            latencies.append((time.perf_counter() - started) * 1000)
+            found += any(match['id'] == target_id for match in matches)
+
+        latencies.sort()
+        print(f'Queries: {args.queries}  recall: {found / args.queries:.2%}')
+        print(f'Latency ms  p50={statistics.median(latencies):.2f}  '
+              f'p95={latencies[int(len(latencies) * 0.95) - 1]:.2f}  max={latencies[-1]:.2f}')
+
+
+if __name__ == '__main__':
+    main()
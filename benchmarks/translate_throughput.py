@@ -0,0 +1,83 @@
+"""
+Offline throughput / latency benchmark for the batch translation pipeline.
+
+Runs translate_segments against the stub provider with simulated latency and
+compares it with translating one segment per request, sequentially.
+
+    python benchmarks/translate_throughput.py --segments 300 --latency-ms 80 --per-kchar-ms 20
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.translator import StubTranslationProvider, translate_segments  # noqa: E402
+
+
+class TimedStubProvider(StubTranslationProvider):
+    """Stub provider that records per-request latency"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.latencies = []
+        self.request_sizes = []
+
+    def translate_batch(self, segments, target_lang):
+        started = time.perf_counter()
+        result = super().translate_batch(segments, target_lang)
+        self.latencies.append((time.perf_counter() - started) * 1000)
+        self.request_sizes.append(len(segments))
+        return result
+
+
+def make_segments(count: int, rng: random.Random):
+    # タイトル・説明程度の短文と本文程度の長文を混ぜる
+    segments = []
+    for _ in range(count):
+        length = rng.choice([40, 120, 300, 2000, 12000])
+        segments.append(''.join(rng.choice('abcdefghij klmnop\n') for _ in range(length)))
+    return segments
+
+
+def report(label: str, provider: TimedStubProvider, segments, elapsed: float):
+    chars = sum(len(segment) for segment in segments)
+    latencies = sorted(provider.latencies)
+    print(f'{label}')
+    print(f'  requests={len(latencies)}  avg segments/request={statistics.mean(provider.request_sizes):.1f}')
+    print(f'  elapsed={elapsed:.2f}s  segments/s={len(segments) / elapsed:.1f}  kchars/s={chars / elapsed / 1000:.1f}')
+    print(f'  request latency ms  p50={statistics.median(latencies):.1f}  '
+          f'p95={latencies[max(0, int(len(latencies) * 0.95) - 1)]:.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--segments', type=int, default=300)
+    parser.add_argument('--latency-ms', type=float, default=80)
+    parser.add_argument('--per-kchar-ms', type=float, default=20)
+    parser.add_argument('--rps', type=float, default=10, help='provider requests per second')
+    parser.add_argument('--concurrency', type=int, default=4)
+    args = parser.parse_args()
+
+    segments = make_segments(args.segments, random.Random(42))
+    options = dict(latency_ms=args.latency_ms, per_kchar_ms=args.per_kchar_ms,
+                   requests_per_second=args.rps, max_concurrency=args.concurrency)
+
+    provider = TimedStubProvider(**options)
+    started = time.perf_counter()
+    translated = translate_segments(segments, provider=provider)
+    report('batched', provider, segments, time.perf_counter() - started)
+    assert len(translated) == len(segments)
+
+    provider = TimedStubProvider(**options)
+    started = time.perf_counter()
+    for segment in segments:
+        translate_segments([segment], provider=provider)
+    report('one segment per call (sequential)', provider, segments, time.perf_counter() - started)
+
+
+if __name__ == '__main__':
+    main()
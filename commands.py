@@ -0,0 +1,128 @@
+import click
+from flask.cli import AppGroup
+
+crawl_cli = AppGroup('crawl', help='Sitemap / RSS crawler commands')
+
+
+@crawl_cli.command('enqueue')
+@click.argument('feed_url')
+def crawl_enqueue(feed_url):
+    """Discover article URLs from a sitemap or RSS/Atom feed"""
+    from services.crawler import enqueue_feed
+    result = enqueue_feed(feed_url)
+    click.echo(f"discovered={result['discovered']} queued={result['queued']} duplicate={result['duplicate']}")
+
+
+@crawl_cli.command('run')
+@click.option('--max-pages', type=int, default=None, help='Stop after this many pages')
+@click.option('--workers', type=int, default=None, help='Total concurrent fetches')
+def crawl_run(max_pages, workers):
+    """Scrape pending URLs in the crawl frontier"""
+    from services.crawler import Crawler
+    crawler = Crawler(workers=workers) if workers else Crawler()
+    result = crawler.run(max_pages=max_pages)
+    click.echo(
+        f"done={result['done']} failed={result['failed']} skipped={result['skipped']} "
+        f"retried={result['retried']} elapsed={result['elapsed_seconds']}s"
+    )
+
+
+@crawl_cli.command('status')
+def crawl_status():
+    """Show crawl frontier counts by status"""
+    from services.crawler import frontier_status
+    for status, count in sorted(frontier_status().items()):
+        click.echo(f"{status}: {count}")
+
+
+minhash_cli = AppGroup('minhash', help='Near-duplicate (MinHash/LSH) index commands')
+
+
+@minhash_cli.command('backfill')
+@click.option('--batch-size', type=int, default=500, show_default=True)
+def minhash_backfill(batch_size):
+    """Compute signatures and LSH buckets for rows that have none"""
+    from services.minhash import backfill
+    indexed = backfill(batch_size=batch_size)
+    click.echo(f"indexed={indexed}")
+
+
+@minhash_cli.command('status')
+def minhash_status():
+    """Show how many rows are in the LSH index"""
+    from services.minhash import index_size
+    click.echo(f"indexed={index_size()}")
+
+
+@click.command('export')
+@click.option('--format', 'export_format', type=click.Choice(['ndjson', 'csv', 'parquet']), default='ndjson',
+              show_default=True)
+@click.option('--output', '-o', required=True, help='Output file')
+@click.option('--fields', default=None, help='Comma separated column names (default: all)')
+@click.option('--since', default=None, help='created_at >= this ISO date')
+@click.option('--until', default=None, help='created_at < this ISO date')
+@click.option('--batch-size', type=int, default=1000, show_default=True, help='Rows fetched per cursor batch')
+def export_command(export_format, output, fields, since, until, batch_size):
+    """Stream scraped_content to NDJSON, CSV or Parquet"""
+    from services import exporter
+    try:
+        # app.py のログが標準出力にも出るため、標準出力への書き出しは受け付けない
+        if output == '-':
+            raise ValueError("--output には標準出力（-）ではなくファイルを指定してください")
+        fields = exporter.parse_fields(fields)
+        rows = exporter.iter_rows(fields, exporter.parse_date(since), exporter.parse_date(until), batch_size)
+        if export_format == 'parquet':
+            written = exporter.write_parquet(output, rows, fields, row_group_size=batch_size * 10)
+            click.echo(f"rows={written}", err=True)
+            return
+
+        chunks = exporter.iter_csv(rows, fields) if export_format == 'csv' else exporter.iter_ndjson(rows)
+        with click.open_file(output, 'w', encoding='utf-8') as f:
+            for chunk in chunks:
+                f.write(chunk)
+    except ValueError as ve:
+        raise click.ClickException(str(ve))
+
+
+notion_cli = AppGroup('notion', help='Notion database commands')
+
+
+@notion_cli.command('sync')
+@click.option('--batch-size', type=int, default=50, show_default=True)
+@click.option('--workers', type=int, default=None, help='Concurrent page creations')
+@click.option('--limit', type=int, default=None, help='Stop after this many rows')
+@click.option('--set', 'assignments', multiple=True, metavar='NAME=VALUE',
+              help='Property value applied to every created page (repeatable)')
+@click.option('--restart', is_flag=True, help='Ignore the checkpoint and retry earlier failures')
+def notion_sync(batch_size, workers, limit, assignments, restart):
+    """Create Notion pages for every row that has no notion_page_id yet"""
+    from services.notion_sync import sync_unsynced, NOTION_SYNC_WORKERS
+    properties = {}
+    for assignment in assignments:
+        name, sep, value = assignment.partition('=')
+        if not sep:
+            raise click.BadParameter(f"NAME=VALUE の形式で指定してください: {assignment}")
+        properties[name] = value
+
+    try:
+        result = sync_unsynced(
+            batch_size=batch_size,
+            workers=workers or NOTION_SYNC_WORKERS,
+            limit=limit,
+            properties=properties,
+            restart=restart
+        )
+    except ValueError as ve:
+        raise click.ClickException(str(ve))
+    click.echo(
+        f"created={result['created']} linked={result['linked']} failed={result['failed']} "
+        f"last_id={result['last_id']} elapsed={result['elapsed_seconds']}s "
+        f"pages_per_second={result['pages_per_second']}"
+    )
+
+
+def register_commands(app):
+    app.cli.add_command(crawl_cli)
+    app.cli.add_command(minhash_cli)
+    app.cli.add_command(export_command)
+    app.cli.add_command(notion_cli)
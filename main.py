@@ -2,7 +2,7 @@ import os
 import sys
 import logging
 from app import app, db
-from sqlalchemy import text
+from sqlalchemy import inspect, text
 
 # Configure logging
 logging.basicConfig(
@@ -24,11 +24,7 @@ def verify_database():
             logger.info("Basic database connection successful")
             
             # Check if all required tables exist
-            tables = db.session.execute(text(
-                "SELECT table_name FROM information_schema.tables WHERE table_schema = 'public'"
-            )).fetchall()
-            
-            table_names = [table[0] for table in tables]
+            table_names = inspect(db.engine).get_table_names()
             logger.info(f"Found tables: {', '.join(table_names)}")
             
             # Verify specific tables
@@ -1,5 +1,7 @@
+import logging
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, text
 
 db = SQLAlchemy()
 
@@ -7,7 +9,7 @@ class ScrapedContent(db.Model):
     __tablename__ = 'scraped_content'
     
     id = db.Column(db.Integer, primary_key=True)
-    url = db.Column(db.String(2048), nullable=False)
+    url = db.Column(db.String(2048), nullable=False, index=True)
     title = db.Column(db.String(512))
     content = db.Column(db.Text)
     description = db.Column(db.Text)
@@ -20,6 +22,11 @@ class ScrapedContent(db.Model):
     header_image = db.Column(db.String(2048))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     notion_page_id = db.Column(db.String(256))
+    content_hash = db.Column(db.String(64), index=True)
+    simhash = db.Column(db.String(16))
+    minhash = db.Column(db.LargeBinary)
+    chunk_offsets = db.Column(db.Text)
+    updated_at = db.Column(db.DateTime)
 
     def to_dict(self):
         return {
@@ -36,5 +43,88 @@ class ScrapedContent(db.Model):
             'translated_description': self.translated_description,
             'header_image': self.header_image,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'notion_page_id': self.notion_page_id
+            'notion_page_id': self.notion_page_id,
+            'content_hash': self.content_hash,
+            'simhash': self.simhash,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+
+
+class CrawlQueueItem(db.Model):
+    """Crawl frontier entry; persisted so a crawl can resume after a restart"""
+    __tablename__ = 'crawl_queue'
+
+    STATUS_PENDING = 'pending'
+    STATUS_IN_PROGRESS = 'in_progress'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_SKIPPED = 'skipped'
+
+    id = db.Column(db.Integer, primary_key=True)
+    url = db.Column(db.String(2048), nullable=False)
+    url_hash = db.Column(db.String(64), nullable=False, unique=True)
+    domain = db.Column(db.String(256), nullable=False, index=True)
+    source = db.Column(db.String(2048))
+    status = db.Column(db.String(16), nullable=False, default=STATUS_PENDING, index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    next_attempt_at = db.Column(db.DateTime)
+    content_id = db.Column(db.Integer, db.ForeignKey('scraped_content.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'url': self.url,
+            'domain': self.domain,
+            'source': self.source,
+            'status': self.status,
+            'attempts': self.attempts,
+            'last_error': self.last_error,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'content_id': self.content_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+class MinHashBucket(db.Model):
+    """LSH band bucket of a ScrapedContent MinHash signature"""
+    __tablename__ = 'minhash_bucket'
+
+    bucket = db.Column(db.BigInteger, primary_key=True, autoincrement=False)
+    content_id = db.Column(db.Integer, db.ForeignKey('scraped_content.id'), primary_key=True,
+                           autoincrement=False, index=True)
+
+
+class JobCheckpoint(db.Model):
+    """Last processed row id of a resumable batch job"""
+    __tablename__ = 'job_checkpoint'
+
+    name = db.Column(db.String(64), primary_key=True)
+    last_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+def upgrade_schema():
+    """
+    Add columns and indexes introduced after a table was first created.
+    db.create_all() only creates missing tables, so existing deployments need this.
+    """
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            db.session.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+            logging.info(f"Added column {table.name}.{column.name}")
+        db.session.commit()
+
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
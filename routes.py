@@ -1,15 +1,21 @@
 import os
 import logging
 import traceback
-from flask import jsonify, request, render_template, Blueprint
+from flask import jsonify, request, render_template, Blueprint, Response, stream_with_context
 from models import ScrapedContent, db
 from services.scraper import scrape_url
-from services.translator import translate_text
+from services.translator import translate_segments
+from services.content_store import save_scraped_content, ensure_chunk_offsets
+from services.chunking import get_chunk
+from services.compression import compress_response
+from services.minhash import find_near_duplicates, unpack_signature
+from services import exporter
 
 bp = Blueprint('main', __name__)
 
 def register_routes(app):
     app.register_blueprint(bp)
+    app.after_request(compress_response)
 
 @bp.route('/')
 def index():
@@ -41,27 +47,35 @@ def scrape():
                 "message": "コンテンツの抽出に失敗しました"
             }), 500
 
-        # データベースへの保存処理
-        content = ScrapedContent()
-        content.url = url
-        content.title = scraped_data.get('title', '')
-        content.content = scraped_data.get('content', '')
-        content.description = scraped_data.get('description', '')
-        content.author = scraped_data.get('author', '')
-        content.publish_date = scraped_data.get('date', '')
-        content.site_name = scraped_data.get('site_name', '')
-        content.header_image = scraped_data.get('header_image', '')
-        
-        db.session.add(content)
-        db.session.commit()
+        # データベースへの保存処理（同じURLの再抽出は差分がある場合のみ更新）
+        content, change, notion_result = save_scraped_content(url, scraped_data)
+
+        # 他のURLで保存済みのほぼ同一の記事を検出
+        near_duplicates = find_near_duplicates(
+            unpack_signature(content.minhash) if content.minhash else None,
+            exclude_id=content.id
+        )
+
+        # 本文は最初のチャンクのみ返し、残りは /api/content/<id>/chunks/<n> で取得する
+        offsets = ensure_chunk_offsets(content)
 
         return jsonify({
             "status": "success",
             "data": {
                 "id": content.id,
                 "title": content.title,
-                "content": content.content,
-                "url": content.url
+                "description": content.description,
+                "author": content.author,
+                "site_name": content.site_name,
+                "publish_date": content.publish_date,
+                "header_image": content.header_image,
+                "content": get_chunk(content.content, offsets, 0),
+                "chunk_count": len(offsets) - 1,
+                "url": content.url,
+                "change": change,
+                "notion_page_id": content.notion_page_id,
+                "notion_sync": notion_result,
+                "near_duplicates": near_duplicates
             }
         })
 
@@ -72,6 +86,34 @@ def scrape():
             "message": f"URLの抽出に失敗しました: {str(e)}"
         }), 500
 
+@bp.route('/api/content/<int:content_id>/chunks/<int:index>', methods=['GET'])
+def get_content_chunk(content_id, index):
+    """Return one section-sized chunk of the stored content body"""
+    content = db.session.get(ScrapedContent, content_id)
+    if not content:
+        return jsonify({
+            "status": "error",
+            "message": "Content not found"
+        }), 404
+
+    offsets = ensure_chunk_offsets(content)
+    total = len(offsets) - 1
+    if index >= total:
+        return jsonify({
+            "status": "error",
+            "message": "Chunk not found"
+        }), 404
+
+    return jsonify({
+        "status": "success",
+        "data": {
+            "id": content.id,
+            "index": index,
+            "chunk_count": total,
+            "html": get_chunk(content.content, offsets, index)
+        }
+    })
+
 @bp.route('/api/translate', methods=['POST'])
 def translate():
     """Translate the scraped content"""
@@ -84,10 +126,10 @@ def translate():
         if not content:
             return jsonify({"error": "Content not found"}), 404
 
-        # Translate title and content
-        translated_title = translate_text(content.title)
-        translated_content = translate_text(content.content)
-        translated_description = translate_text(content.description) if content.description else None
+        # Translate title, content and description in one batch
+        translated_title, translated_content, translated_description = translate_segments(
+            [content.title, content.content, content.description or None]
+        )
 
         # Update database
         content.translated_title = translated_title
@@ -106,6 +148,40 @@ def translate():
         logging.error(f"Traceback: {traceback.format_exc()}")
         return jsonify({"error": str(e)}), 500
 
+@bp.route('/api/export', methods=['GET'])
+def export():
+    """Stream scraped content as NDJSON or CSV"""
+    try:
+        export_format = request.args.get('format', 'ndjson')
+        if export_format not in ('ndjson', 'csv'):
+            return jsonify({
+                "status": "error",
+                "message": "format は ndjson または csv を指定してください（Parquet は CLI から出力できます）"
+            }), 400
+
+        fields = exporter.parse_fields(request.args.get('fields'))
+        since = exporter.parse_date(request.args.get('since'))
+        until = exporter.parse_date(request.args.get('until'))
+    except ValueError as ve:
+        return jsonify({
+            "status": "error",
+            "message": str(ve)
+        }), 400
+
+    rows = exporter.iter_rows(fields, since, until)
+    if export_format == 'csv':
+        body = exporter.iter_csv(rows, fields)
+        mimetype = 'text/csv'
+    else:
+        body = exporter.iter_ndjson(rows)
+        mimetype = 'application/x-ndjson'
+
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=scraped_content.{export_format}'}
+    )
+
 @bp.route('/api/notion/properties', methods=['GET'])
 def get_notion_properties():
     """Get all properties from the Notion database"""
@@ -154,9 +230,12 @@ def save_to_notion():
                 "type": "validation_error"
             }), 404
 
-        # Save to Notion
-        from services.notion_client import create_notion_page
-        result = create_notion_page(content, data['properties'])
+        # Save to Notion (update the linked page instead of creating a duplicate)
+        from services.notion_client import create_notion_page, update_notion_page
+        if content.notion_page_id:
+            result = update_notion_page(content, data['properties'])
+        else:
+            result = create_notion_page(content, data['properties'])
 
         if result["status"] == "error":
             error_code = 400 if result["type"] == "validation_error" else 500
@@ -0,0 +1,126 @@
+import os
+import re
+import json
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+
+CONTENT_CHUNK_CHARS = int(os.environ.get('CONTENT_CHUNK_CHARS', '20000'))
+
+VOID_ELEMENTS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr'
+}
+# 分割位置（開始位置, その位置で開いている祖先要素の (開始タグの開始, 開始タグの終了, タグ名)）
+ChunkCut = Tuple[int, List[Tuple[int, int, str]]]
+
+
+class _Node:
+    __slots__ = ('tag', 'start', 'open_end', 'end', 'children')
+
+    def __init__(self, tag: str, start: int, open_end: int):
+        self.tag = tag
+        self.start = start
+        self.open_end = open_end
+        self.end: Optional[int] = None
+        self.children: List['_Node'] = []
+
+
+class _OffsetParser(HTMLParser):
+    """Records absolute source offsets of every element's open tag and end"""
+
+    def __init__(self, source: str):
+        super().__init__(convert_charrefs=True)
+        self.source = source
+        self.line_starts = [0] + [match.end() for match in re.finditer('\n', source)]
+        self.roots: List[_Node] = []
+        self.stack: List[_Node] = []
+
+    def _offset(self) -> int:
+        line, column = self.getpos()
+        return self.line_starts[line - 1] + column
+
+    def _add(self, node: _Node) -> None:
+        (self.stack[-1].children if self.stack else self.roots).append(node)
+
+    def handle_starttag(self, tag, attrs):
+        start = self._offset()
+        node = _Node(tag, start, start + len(self.get_starttag_text()))
+        self._add(node)
+        if tag in VOID_ELEMENTS:
+            node.end = node.open_end
+        else:
+            self.stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        start = self._offset()
+        node = _Node(tag, start, start + len(self.get_starttag_text()))
+        node.end = node.open_end
+        self._add(node)
+
+    def handle_endtag(self, tag):
+        position = self._offset()
+        end = self.source.find('>', position) + 1 or len(self.source)
+        # 対応する開始タグまで閉じる（入れ子が崩れている場合にも備える）
+        for depth in range(len(self.stack) - 1, -1, -1):
+            if self.stack[depth].tag == tag:
+                for node in self.stack[depth:]:
+                    node.end = end
+                del self.stack[depth:]
+                break
+
+    def close(self):
+        super().close()
+        for node in self.stack:
+            node.end = len(self.source)
+        self.stack = []
+
+
+def compute_chunk_offsets(html: Optional[str], target_chars: int = CONTENT_CHUNK_CHARS) -> List[ChunkCut]:
+    """
+    Cut points that split the content into chunks of about target_chars.
+    Cuts are placed where an element starts; elements larger than target_chars are
+    descended into at any depth. Each cut records the ancestors still open at that
+    point so get_chunk can reopen and close them and return balanced HTML.
+    The chunks cover the whole string, text between elements included.
+    """
+    if not html:
+        return [(0, []), (0, [])]
+
+    parser = _OffsetParser(html)
+    parser.feed(html)
+    parser.close()
+
+    cuts: List[ChunkCut] = [(0, [])]
+
+    def walk(nodes: List[_Node], ancestors: List[_Node]) -> None:
+        for node in nodes:
+            if node.start - cuts[-1][0] >= target_chars:
+                cuts.append((node.start, [(a.start, a.open_end, a.tag) for a in ancestors]))
+            if node.children and node.end - node.start > target_chars:
+                walk(node.children, ancestors + [node])
+
+    walk(parser.roots, [])
+    cuts.append((len(html), []))
+    return cuts
+
+
+def dumps_offsets(offsets: List[ChunkCut]) -> str:
+    return json.dumps(offsets)
+
+
+def loads_offsets(value: Optional[str]) -> Optional[List[ChunkCut]]:
+    """Stored cut points, or None if missing or in the old integer-only format"""
+    offsets = json.loads(value) if value else None
+    if not offsets or not isinstance(offsets[0], list):
+        return None
+    return [(position, [tuple(ancestor) for ancestor in ancestors]) for position, ancestors in offsets]
+
+
+def get_chunk(html: Optional[str], offsets: List[ChunkCut], index: int) -> str:
+    html = html or ''
+    start, opened = offsets[index]
+    end, still_open = offsets[index + 1]
+    # 前のチャンクから続く祖先要素を開き直し、次のチャンクへ続く要素はここで閉じる
+    prefix = ''.join(html[tag_start:tag_end] for tag_start, tag_end, _ in opened)
+    suffix = ''.join(f'</{tag}>' for _, _, tag in reversed(still_open))
+    return prefix + html[start:end] + suffix
@@ -0,0 +1,46 @@
+import gzip
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # brotli は任意。未インストールなら gzip のみ
+    brotli = None
+
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'text/html',
+    'text/css',
+    'text/plain'
+}
+
+
+def compress_response(response: Response) -> Response:
+    """after_request hook: brotli or gzip encode buffered text/JSON responses"""
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code >= 300
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_BYTES:
+        return response
+
+    if brotli is not None and request.accept_encodings['br']:
+        body = brotli.compress(data, quality=BROTLI_QUALITY)
+        encoding = 'br'
+    elif request.accept_encodings['gzip']:
+        body = gzip.compress(data, compresslevel=GZIP_LEVEL)
+        encoding = 'gzip'
+    else:
+        return response
+
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    response.headers['Content-Length'] = str(len(body))
+    return response
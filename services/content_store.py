@@ -0,0 +1,90 @@
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+from models import ScrapedContent, db
+from services.fingerprint import fingerprint, hamming_distance
+from services.minhash import index_content
+from services.chunking import ChunkCut, compute_chunk_offsets, dumps_offsets, loads_offsets
+
+STATUS_CREATED = 'created'
+STATUS_UPDATED = 'updated'
+STATUS_UNCHANGED = 'unchanged'
+
+
+def _apply_scraped_data(content: ScrapedContent, scraped_data: Dict[str, Any]) -> None:
+    content.title = scraped_data.get('title', '')
+    content.content = scraped_data.get('content', '')
+    content.description = scraped_data.get('description', '')
+    content.author = scraped_data.get('author', '')
+    content.publish_date = scraped_data.get('date', '')
+    content.site_name = scraped_data.get('site_name', '')
+    content.header_image = scraped_data.get('header_image', '')
+    content.chunk_offsets = dumps_offsets(compute_chunk_offsets(content.content))
+
+
+def save_scraped_content(url: str, scraped_data: Dict[str, Any]) -> Tuple[ScrapedContent, str, Optional[Dict[str, Any]]]:
+    """
+    Persist the result of scrape_url, reusing the latest row for the same URL,
+    and keep the row's MinHash/LSH entry current.
+    Returns (content, status, notion_result): status is created / updated / unchanged,
+    and notion_result is set when an updated row was synced to its existing Notion page.
+    """
+    fp = fingerprint(scraped_data.get('title'), scraped_data.get('description'), scraped_data.get('content'))
+
+    existing = ScrapedContent.query.filter_by(url=url).order_by(ScrapedContent.id.desc()).first()
+    if existing is None:
+        content = ScrapedContent()
+        content.url = url
+        _apply_scraped_data(content, scraped_data)
+        content.content_hash = fp['content_hash']
+        content.simhash = fp['simhash']
+        db.session.add(content)
+        db.session.flush()
+        index_content(content, commit=False)
+        db.session.commit()
+        return content, STATUS_CREATED, None
+
+    if not existing.content_hash:
+        # 指紋導入前の行はその場で計算して比較する
+        old_fp = fingerprint(existing.title, existing.description, existing.content)
+        existing.content_hash = old_fp['content_hash']
+        existing.simhash = old_fp['simhash']
+
+    if existing.content_hash == fp['content_hash']:
+        if existing.minhash is None:
+            index_content(existing, commit=False)
+        db.session.commit()
+        return existing, STATUS_UNCHANGED, None
+
+    distance = hamming_distance(existing.simhash, fp['simhash'])
+    logging.info(f"Content changed for {url} (simhash distance: {distance})")
+
+    _apply_scraped_data(existing, scraped_data)
+    existing.content_hash = fp['content_hash']
+    existing.simhash = fp['simhash']
+    existing.updated_at = datetime.utcnow()
+    # 本文が変わったので古い翻訳は破棄する
+    existing.translated_title = None
+    existing.translated_content = None
+    existing.translated_description = None
+    index_content(existing, commit=False)
+    db.session.commit()
+
+    notion_result = None
+    if existing.notion_page_id:
+        from services.notion_client import update_notion_page
+        notion_result = update_notion_page(existing)
+        if notion_result["status"] == "error":
+            logging.error(f"Notion update failed for content {existing.id}: {notion_result['error']}")
+
+    return existing, STATUS_UPDATED, notion_result
+
+
+def ensure_chunk_offsets(content: ScrapedContent) -> List[ChunkCut]:
+    """Chunk offsets of the row, computed and stored on first use for rows saved in an older format"""
+    offsets = loads_offsets(content.chunk_offsets)
+    if offsets is None:
+        offsets = compute_chunk_offsets(content.content)
+        content.chunk_offsets = dumps_offsets(offsets)
+        db.session.commit()
+    return offsets
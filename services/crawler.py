@@ -0,0 +1,433 @@
+import os
+import gzip
+import time
+import hashlib
+import logging
+import threading
+import traceback
+import xml.etree.ElementTree as ET
+from collections import defaultdict, deque, Counter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple, Any, Union
+from urllib.parse import urlparse, urljoin
+from urllib.robotparser import RobotFileParser
+
+import httpx
+import requests
+
+from models import CrawlQueueItem, ScrapedContent, db
+from services.scraper import scrape_url
+from services.content_store import save_scraped_content
+from services.rate_limit import RateLimiter
+
+CRAWL_WORKERS = int(os.environ.get('CRAWL_WORKERS', '4'))
+CRAWL_DOMAIN_CONCURRENCY = int(os.environ.get('CRAWL_DOMAIN_CONCURRENCY', '1'))
+CRAWL_DOMAIN_DELAY = float(os.environ.get('CRAWL_DOMAIN_DELAY', '1.0'))
+CRAWL_MAX_ATTEMPTS = int(os.environ.get('CRAWL_MAX_ATTEMPTS', '3'))
+# 再試行までの待ち時間（秒）。試行ごとに倍にする
+CRAWL_RETRY_BACKOFF = float(os.environ.get('CRAWL_RETRY_BACKOFF', '30'))
+CRAWL_RETRY_BACKOFF_MAX = 3600.0
+# 4xx のうち時間をおけば成功し得るもの
+RETRYABLE_CLIENT_ERRORS = {408, 429}
+CRAWL_USER_AGENT = os.environ.get('CRAWL_USER_AGENT', 'NotionWebScraper')
+ROBOTS_CACHE_TTL = int(os.environ.get('CRAWL_ROBOTS_TTL', '3600'))
+# robots.txt を取得できなかった場合は短時間だけ覚えておき、その後取り直す
+ROBOTS_FAILURE_TTL = int(os.environ.get('CRAWL_ROBOTS_FAILURE_TTL', '60'))
+
+FEED_TIMEOUT = 30
+MAX_SITEMAP_DEPTH = 3
+ENQUEUE_BATCH_SIZE = 500
+
+
+def url_hash(url: str) -> str:
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1] if '}' in tag else tag
+
+
+def _iter_feed_entries(stream) -> Iterator[Tuple[str, str]]:
+    """
+    Stream-parse a sitemap, sitemap index, RSS or Atom document.
+    Yields ('page', url) or ('sitemap', url); finished records are detached
+    from the tree as soon as they are read so memory stays flat.
+    """
+    stack: List[ET.Element] = []
+    for event, elem in ET.iterparse(stream, events=('start', 'end')):
+        if event == 'start':
+            stack.append(elem)
+            continue
+
+        stack.pop()
+        tag = _local_name(elem.tag)
+        found: Optional[Tuple[str, str]] = None
+
+        if tag == 'url':
+            loc = elem.findtext('{*}loc') or elem.findtext('loc')
+            if loc:
+                found = ('page', loc.strip())
+        elif tag == 'sitemap':
+            loc = elem.findtext('{*}loc') or elem.findtext('loc')
+            if loc:
+                found = ('sitemap', loc.strip())
+        elif tag == 'item':
+            # RSS 2.0 / RSS 1.0 (RDF)
+            link = elem.findtext('link') or elem.findtext('{*}link')
+            if link:
+                found = ('page', link.strip())
+        elif tag == 'entry':
+            # Atom: rel="alternate" もしくは rel 指定なしのリンクを採用
+            for link in elem.findall('{*}link'):
+                if link.get('rel', 'alternate') == 'alternate' and link.get('href'):
+                    found = ('page', link.get('href').strip())
+                    break
+        else:
+            continue
+
+        if found:
+            yield found
+        if stack:
+            stack[-1].remove(elem)
+        else:
+            elem.clear()
+
+
+def iter_feed_urls(feed_url: str, _depth: int = 0) -> Iterator[str]:
+    """Yield article URLs discovered from a sitemap(.xml/.xml.gz), sitemap index, RSS or Atom feed"""
+    child_sitemaps = []
+    response = requests.get(
+        feed_url,
+        headers={'User-Agent': CRAWL_USER_AGENT},
+        timeout=FEED_TIMEOUT,
+        stream=True
+    )
+    try:
+        response.raise_for_status()
+        response.raw.decode_content = True
+        stream = response.raw
+        if urlparse(feed_url).path.endswith('.gz'):
+            stream = gzip.GzipFile(fileobj=response.raw)
+
+        for kind, url in _iter_feed_entries(stream):
+            url = urljoin(feed_url, url)
+            if kind == 'sitemap':
+                child_sitemaps.append(url)
+            else:
+                yield url
+    finally:
+        response.close()
+
+    # サイトマップインデックスは親の接続を閉じてから順に展開する
+    for child in child_sitemaps:
+        if _depth >= MAX_SITEMAP_DEPTH:
+            logging.warning(f"Sitemap depth limit reached, skipping: {child}")
+            continue
+        try:
+            yield from iter_feed_urls(child, _depth + 1)
+        except Exception as e:
+            logging.error(f"Error reading sitemap {child}: {str(e)}")
+
+
+class RobotsUnavailableError(Exception):
+    """robots.txt could not be fetched (network error or 5xx); the page should be retried later"""
+
+
+class RobotsCache:
+    """
+    Per-origin robots.txt cache with a TTL.
+    Fetch failures are cached for ROBOTS_FAILURE_TTL only and raise RobotsUnavailableError.
+    """
+
+    def __init__(self, user_agent: str = CRAWL_USER_AGENT, ttl: int = ROBOTS_CACHE_TTL,
+                 failure_ttl: int = ROBOTS_FAILURE_TTL):
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        self._entries: Dict[str, Tuple[float, Union[RobotFileParser, RobotsUnavailableError]]] = {}
+        self._lock = threading.Lock()
+
+    def _fetch(self, origin: str) -> Union[RobotFileParser, RobotsUnavailableError]:
+        parser = RobotFileParser(f"{origin}/robots.txt")
+        try:
+            response = requests.get(
+                f"{origin}/robots.txt",
+                headers={'User-Agent': self.user_agent},
+                timeout=10
+            )
+        except requests.RequestException as e:
+            logging.warning(f"robots.txt fetch failed for {origin}: {str(e)}")
+            return RobotsUnavailableError(f"robots.txt を取得できません: {str(e)}")
+
+        if response.status_code >= 500:
+            # 一時的な障害とみなし、許可も除外もせず後で再試行する
+            logging.warning(f"robots.txt fetch failed for {origin}: HTTP {response.status_code}")
+            return RobotsUnavailableError(f"robots.txt を取得できません: HTTP {response.status_code}")
+        if response.status_code in (401, 403):
+            parser.disallow_all = True
+        elif response.status_code >= 400:
+            parser.allow_all = True
+        else:
+            parser.parse(response.text.splitlines())
+        parser.modified()
+        return parser
+
+    def get(self, url: str) -> RobotFileParser:
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(origin)
+        if entry is None or now - entry[0] >= self._ttl_for(entry[1]):
+            entry = (now, self._fetch(origin))
+            with self._lock:
+                self._entries[origin] = entry
+
+        if isinstance(entry[1], RobotsUnavailableError):
+            raise RobotsUnavailableError(str(entry[1]))
+        return entry[1]
+
+    def _ttl_for(self, value: Union[RobotFileParser, RobotsUnavailableError]) -> int:
+        return self.failure_ttl if isinstance(value, RobotsUnavailableError) else self.ttl
+
+    def can_fetch(self, url: str) -> bool:
+        return self.get(url).can_fetch(self.user_agent, url)
+
+    def crawl_delay(self, url: str) -> Optional[float]:
+        delay = self.get(url).crawl_delay(self.user_agent)
+        return float(delay) if delay is not None else None
+
+
+def enqueue_feed(feed_url: str) -> Dict[str, int]:
+    """Discover URLs from a feed and add unseen ones to the crawl frontier"""
+    stats = Counter()
+    batch: Dict[str, str] = {}
+
+    def flush():
+        if not batch:
+            return
+        hashes = list(batch.keys())
+        urls = list(batch.values())
+        queued = {
+            row[0] for row in db.session.query(CrawlQueueItem.url_hash)
+            .filter(CrawlQueueItem.url_hash.in_(hashes))
+        }
+        scraped = {
+            row[0] for row in db.session.query(ScrapedContent.url)
+            .filter(ScrapedContent.url.in_(urls))
+        }
+        for h, url in batch.items():
+            if h in queued or url in scraped:
+                stats['duplicate'] += 1
+                continue
+            db.session.add(CrawlQueueItem(
+                url=url,
+                url_hash=h,
+                domain=urlparse(url).netloc.lower(),
+                source=feed_url,
+                status=CrawlQueueItem.STATUS_PENDING,
+                attempts=0
+            ))
+            stats['queued'] += 1
+        db.session.commit()
+        batch.clear()
+
+    for url in iter_feed_urls(feed_url):
+        if urlparse(url).scheme not in ('http', 'https'):
+            continue
+        stats['discovered'] += 1
+        batch[url_hash(url)] = url
+        if len(batch) >= ENQUEUE_BATCH_SIZE:
+            flush()
+    flush()
+
+    logging.info(f"Feed {feed_url}: {dict(stats)}")
+    return {'discovered': stats['discovered'], 'queued': stats['queued'], 'duplicate': stats['duplicate']}
+
+
+class Crawler:
+    """
+    Polite crawl frontier: per-domain concurrency and delay, robots.txt aware.
+    Worker threads only fetch and extract; all database writes happen on the
+    calling thread so it can run inside a normal Flask app context.
+    """
+
+    def __init__(self,
+                 workers: int = CRAWL_WORKERS,
+                 domain_concurrency: int = CRAWL_DOMAIN_CONCURRENCY,
+                 domain_delay: float = CRAWL_DOMAIN_DELAY,
+                 max_attempts: int = CRAWL_MAX_ATTEMPTS,
+                 robots: Optional[RobotsCache] = None):
+        self.workers = max(1, workers)
+        self.domain_concurrency = max(1, domain_concurrency)
+        self.domain_delay = domain_delay
+        self.max_attempts = max_attempts
+        self.robots = robots or RobotsCache()
+        self._limiters: Dict[str, RateLimiter] = {}
+        self._lock = threading.Lock()
+
+    def _limiter(self, domain: str, url: str) -> RateLimiter:
+        with self._lock:
+            limiter = self._limiters.get(domain)
+            if limiter is None:
+                robots_delay = self.robots.crawl_delay(url) or 0.0
+                limiter = RateLimiter(max(self.domain_delay, robots_delay))
+                self._limiters[domain] = limiter
+            return limiter
+
+    def _fetch(self, url: str, domain: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Runs in a worker thread"""
+        if not self.robots.can_fetch(url):
+            return CrawlQueueItem.STATUS_SKIPPED, None
+        self._limiter(domain, url).wait()
+        return CrawlQueueItem.STATUS_DONE, scrape_url(url)
+
+    def _load_pending(self, after_id: int, limit: int) -> List[Tuple[int, str, str]]:
+        return [
+            (row.id, row.url, row.domain)
+            for row in db.session.query(CrawlQueueItem.id, CrawlQueueItem.url, CrawlQueueItem.domain)
+            .filter(CrawlQueueItem.status == CrawlQueueItem.STATUS_PENDING,
+                    CrawlQueueItem.id > after_id,
+                    db.or_(CrawlQueueItem.next_attempt_at.is_(None),
+                           CrawlQueueItem.next_attempt_at <= datetime.utcnow()))
+            .order_by(CrawlQueueItem.id)
+            .limit(limit)
+        ]
+
+    def _next_retry_at(self) -> Optional[datetime]:
+        return db.session.query(db.func.min(CrawlQueueItem.next_attempt_at)) \
+            .filter(CrawlQueueItem.status == CrawlQueueItem.STATUS_PENDING).scalar()
+
+    def _retry_delay(self, attempts: int) -> float:
+        return min(CRAWL_RETRY_BACKOFF_MAX, CRAWL_RETRY_BACKOFF * 2 ** max(0, attempts - 1))
+
+    def _finish(self, item_id: int, status: str, content_id: Optional[int] = None,
+                error: Optional[str] = None, retry_at: Optional[datetime] = None) -> CrawlQueueItem:
+        item = db.session.get(CrawlQueueItem, item_id)
+        item.status = status
+        item.last_error = error
+        item.next_attempt_at = retry_at
+        if content_id is not None:
+            item.content_id = content_id
+        db.session.commit()
+        return item
+
+    def run(self, max_pages: Optional[int] = None) -> Dict[str, Any]:
+        """Crawl pending frontier entries until the queue is empty or max_pages is reached"""
+        # 前回異常終了時に処理中だったものを再開対象に戻す
+        reset = CrawlQueueItem.query.filter_by(status=CrawlQueueItem.STATUS_IN_PROGRESS) \
+            .update({'status': CrawlQueueItem.STATUS_PENDING})
+        db.session.commit()
+        if reset:
+            logging.info(f"Resuming {reset} interrupted crawl item(s)")
+
+        stats = Counter()
+        queues: Dict[str, deque] = defaultdict(deque)
+        active = Counter()
+        futures = {}
+        cursor = 0
+        exhausted = False
+        started = time.monotonic()
+
+        def budget_left() -> bool:
+            return max_pages is None or stats['started'] < max_pages
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while True:
+                queued = sum(len(q) for q in queues.values())
+                if not exhausted and queued < self.workers * 4 and budget_left():
+                    rows = self._load_pending(cursor, self.workers * 16)
+                    exhausted = not rows
+                    for item_id, url, domain in rows:
+                        queues[domain].append((item_id, url))
+                        cursor = item_id
+
+                # ドメインごとの同時実行数を守りながらラウンドロビンで投入する
+                for domain in list(queues.keys()):
+                    q = queues[domain]
+                    while (q and active[domain] < self.domain_concurrency
+                           and len(futures) < self.workers and budget_left()):
+                        item_id, url = q.popleft()
+                        item = db.session.get(CrawlQueueItem, item_id)
+                        item.status = CrawlQueueItem.STATUS_IN_PROGRESS
+                        item.attempts = (item.attempts or 0) + 1
+                        db.session.commit()
+                        futures[executor.submit(self._fetch, url, domain)] = (item_id, url, domain)
+                        active[domain] += 1
+                        stats['started'] += 1
+                    if not q:
+                        del queues[domain]
+
+                if not futures:
+                    if not budget_left():
+                        break
+                    if exhausted and not queues:
+                        # 再試行待ちのものがあれば、最も早いものの時刻まで待って読み直す
+                        retry_at = self._next_retry_at()
+                        if retry_at is None:
+                            break
+                        time.sleep(max(0.0, (retry_at - datetime.utcnow()).total_seconds()))
+                        cursor, exhausted = 0, False
+                    continue
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item_id, url, domain = futures.pop(future)
+                    active[domain] -= 1
+                    try:
+                        status, scraped_data = future.result()
+                        if status == CrawlQueueItem.STATUS_SKIPPED:
+                            self._finish(item_id, status, error='robots.txt により除外')
+                        elif not scraped_data or not scraped_data.get('content'):
+                            raise Exception("コンテンツの抽出に失敗しました")
+                        else:
+                            content, _, _ = save_scraped_content(url, scraped_data)
+                            self._finish(item_id, status, content_id=content.id)
+                        stats[status] += 1
+                    except Exception as e:
+                        db.session.rollback()
+                        status_code = _http_status(e)
+                        item = db.session.get(CrawlQueueItem, item_id)
+                        if (status_code and 400 <= status_code < 500
+                                and status_code not in RETRYABLE_CLIENT_ERRORS):
+                            # 404 などは再試行しても結果が変わらない
+                            logging.warning(f"Crawl failed for {url}: HTTP {status_code}")
+                            self._finish(item_id, CrawlQueueItem.STATUS_FAILED, error=str(e))
+                            stats[CrawlQueueItem.STATUS_FAILED] += 1
+                        elif item.attempts >= self.max_attempts:
+                            logging.error(f"Crawl error for {url}: {str(e)}")
+                            self._finish(item_id, CrawlQueueItem.STATUS_FAILED, error=str(e))
+                            stats[CrawlQueueItem.STATUS_FAILED] += 1
+                        else:
+                            delay = self._retry_delay(item.attempts)
+                            logging.error(f"Crawl error for {url}: {str(e)} (retrying in {delay:.0f}s)")
+                            if status_code is None:
+                                logging.debug(traceback.format_exc())
+                            self._finish(item_id, CrawlQueueItem.STATUS_PENDING, error=str(e),
+                                         retry_at=datetime.utcnow() + timedelta(seconds=delay))
+                            stats['retried'] += 1
+
+        elapsed = time.monotonic() - started
+        return {
+            'done': stats[CrawlQueueItem.STATUS_DONE],
+            'failed': stats[CrawlQueueItem.STATUS_FAILED],
+            'skipped': stats[CrawlQueueItem.STATUS_SKIPPED],
+            'retried': stats['retried'],
+            'elapsed_seconds': round(elapsed, 2)
+        }
+
+
+def _http_status(error: Optional[BaseException]) -> Optional[int]:
+    """HTTP status code of the response behind a scrape error, if any"""
+    while error is not None:
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code
+        error = error.__cause__ or error.__context__
+    return None
+
+
+def frontier_status() -> Dict[str, int]:
+    rows = db.session.query(CrawlQueueItem.status, db.func.count(CrawlQueueItem.id)) \
+        .group_by(CrawlQueueItem.status).all()
+    return {status: count for status, count in rows}
@@ -0,0 +1,85 @@
+import os
+import logging
+import sqlite3
+from typing import Any, Dict
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_SQLITE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scraper.db')
+
+SQLITE_BUSY_TIMEOUT = float(os.environ.get('SQLITE_BUSY_TIMEOUT', '30'))
+SQLITE_POOL_SIZE = int(os.environ.get('SQLITE_POOL_SIZE', '10'))
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    # WAL では NORMAL でも破損はせず、電源断時に直近のコミットが失われ得るのみ
+    'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    # 負の値は KiB 単位（デフォルト 64MB）
+    'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', '-65536')),
+    'busy_timeout': int(SQLITE_BUSY_TIMEOUT * 1000),
+    'temp_store': 'MEMORY',
+    'foreign_keys': 'ON'
+}
+
+
+def resolve_database_url() -> str:
+    """
+    DATABASE_URL, normalized for SQLAlchemy.
+    Falls back to an embedded SQLite file (SQLITE_PATH) when it is not set.
+    """
+    database_url = os.environ.get('DATABASE_URL')
+    if not database_url:
+        path = os.path.abspath(os.environ.get('SQLITE_PATH', DEFAULT_SQLITE_PATH))
+        logging.warning(f"DATABASE_URL is not set, using embedded SQLite database at {path}")
+        return f'sqlite:///{path}'
+
+    if database_url.startswith('postgres://'):
+        database_url = database_url.replace('postgres://', 'postgresql://', 1)
+    return database_url
+
+
+def is_sqlite(database_url: str) -> bool:
+    return database_url.startswith('sqlite')
+
+
+def engine_options(database_url: str) -> Dict[str, Any]:
+    """SQLALCHEMY_ENGINE_OPTIONS suited to the database backend"""
+    if is_sqlite(database_url):
+        connect_args = {
+            'timeout': SQLITE_BUSY_TIMEOUT,
+            'check_same_thread': False
+        }
+        if database_url in ('sqlite://', 'sqlite:///:memory:'):
+            # インメモリDBは接続ごとに別のDBになるため SQLAlchemy 既定のプールに任せる
+            return {'connect_args': connect_args}
+
+        # 接続はローカルファイルを開くだけなので再接続・死活確認は不要。
+        # WAL では読み取りは並行できるが書き込みは1つずつなので、
+        # 書き込み待ちは busy timeout（sqlite3 の timeout）で吸収する
+        return {
+            'pool_size': SQLITE_POOL_SIZE,
+            'max_overflow': 0,
+            'pool_timeout': 30,
+            'connect_args': connect_args
+        }
+
+    return {
+        'pool_recycle': 300,
+        'pool_pre_ping': True,
+        'pool_timeout': 30,
+        'pool_size': 10,
+        'max_overflow': 5
+    }
+
+
+@event.listens_for(Engine, 'connect')
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply SQLITE_PRAGMAS to every new SQLite connection"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
@@ -0,0 +1,124 @@
+import io
+import csv
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import select
+from models import ScrapedContent, db
+
+EXPORT_FORMATS = ('ndjson', 'csv', 'parquet')
+EXPORTABLE_FIELDS = [
+    column.name for column in ScrapedContent.__table__.columns
+    if column.name not in ('minhash',)
+]
+DEFAULT_BATCH_SIZE = 1000
+# HTTP レスポンスに書き出す単位（小さな書き込みを何度も行わないようにまとめる）
+CHUNK_BYTES = 64 * 1024
+
+
+def parse_fields(value: Optional[str]) -> List[str]:
+    """Validate a comma separated field list; empty means every exportable field"""
+    if not value:
+        return list(EXPORTABLE_FIELDS)
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in EXPORTABLE_FIELDS]
+    if unknown:
+        raise ValueError(f"不明なフィールド: {', '.join(unknown)}")
+    return fields
+
+
+def parse_date(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"日付の形式が不正です: {value}")
+
+
+def iter_rows(fields: List[str],
+              since: Optional[datetime] = None,
+              until: Optional[datetime] = None,
+              batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the selected columns with a server-side cursor, batch_size rows at a time.
+    Only plain column values are loaded, never full ScrapedContent objects.
+    """
+    stmt = select(*[getattr(ScrapedContent, field) for field in fields]).order_by(ScrapedContent.id)
+    if since:
+        stmt = stmt.where(ScrapedContent.created_at >= since)
+    if until:
+        stmt = stmt.where(ScrapedContent.created_at < until)
+
+    result = db.session.execute(stmt.execution_options(yield_per=batch_size))
+    try:
+        for partition in result.partitions():
+            for row in partition:
+                yield dict(zip(fields, row))
+    finally:
+        result.close()
+
+
+def _serialize(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def iter_ndjson(rows: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    buffer = []
+    size = 0
+    for row in rows:
+        line = json.dumps({key: _serialize(value) for key, value in row.items()}, ensure_ascii=False) + '\n'
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def iter_csv(rows: Iterator[Dict[str, Any]], fields: List[str]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for row in rows:
+        writer.writerow([_serialize(row[field]) for field in fields])
+        if buffer.tell() >= CHUNK_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def write_parquet(path: str, rows: Iterator[Dict[str, Any]], fields: List[str],
+                  row_group_size: int = DEFAULT_BATCH_SIZE * 10) -> int:
+    """Write rows to a Parquet file one row group at a time; requires pyarrow"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Parquet 形式の出力には pyarrow が必要です (pip install pyarrow)")
+
+    type_mapping = {int: pa.int64(), datetime: pa.timestamp('us')}
+    schema = pa.schema([
+        (field, type_mapping.get(ScrapedContent.__table__.columns[field].type.python_type, pa.string()))
+        for field in fields
+    ])
+
+    written = 0
+    batch: List[Dict[str, Any]] = []
+    with pq.ParquetWriter(path, schema) as writer:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= row_group_size:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                written += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            written += len(batch)
+    return written
@@ -0,0 +1,233 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Union
+from urllib.parse import urlparse
+
+import httpx
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# 初回（観測値がないホスト）のタイムアウトと、適応後の下限・上限（秒）
+CONNECT_TIMEOUT_INITIAL = float(os.environ.get('FETCH_CONNECT_TIMEOUT', '10'))
+CONNECT_TIMEOUT_MIN = 1.0
+CONNECT_TIMEOUT_MAX = 15.0
+READ_TIMEOUT_INITIAL = float(os.environ.get('FETCH_READ_TIMEOUT', '30'))
+READ_TIMEOUT_MIN = 3.0
+READ_TIMEOUT_MAX = 60.0
+
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('FETCH_CIRCUIT_FAILURES', '5'))
+CIRCUIT_COOLDOWN = float(os.environ.get('FETCH_CIRCUIT_COOLDOWN', '60'))
+
+MAX_CONNECTIONS = int(os.environ.get('FETCH_MAX_CONNECTIONS', '100'))
+MAX_KEEPALIVE_CONNECTIONS = 20
+
+
+class CircuitOpenError(Exception):
+    """Raised without touching the network while a host's circuit breaker is open"""
+
+
+class _LatencyEstimator:
+    """Smoothed latency and deviation (TCP RTO style); the timeout is mean + 4 * deviation"""
+
+    def __init__(self, initial: float, floor: float, cap: float):
+        self.initial = initial
+        self.floor = floor
+        self.cap = cap
+        self.mean: Optional[float] = None
+        self.deviation = 0.0
+
+    def observe(self, sample: float) -> None:
+        if self.mean is None:
+            self.mean = sample
+            self.deviation = sample / 2
+        else:
+            self.deviation = 0.75 * self.deviation + 0.25 * abs(self.mean - sample)
+            self.mean = 0.875 * self.mean + 0.125 * sample
+
+    def timeout(self) -> float:
+        if self.mean is None:
+            return self.initial
+        return min(self.cap, max(self.floor, self.mean + 4 * self.deviation))
+
+
+class _HostState:
+    def __init__(self):
+        self.connect = _LatencyEstimator(CONNECT_TIMEOUT_INITIAL, CONNECT_TIMEOUT_MIN, CONNECT_TIMEOUT_MAX)
+        self.read = _LatencyEstimator(READ_TIMEOUT_INITIAL, READ_TIMEOUT_MIN, READ_TIMEOUT_MAX)
+        self.failures = 0
+        self.open_until = 0.0
+        self.probing = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'connect_timeout': round(self.connect.timeout(), 2),
+            'read_timeout': round(self.read.timeout(), 2),
+            'failures': self.failures,
+            'circuit_open': self.open_until > time.monotonic(),
+            'probing': self.probing
+        }
+
+
+class FetchEngine:
+    """
+    Shared asyncio HTTP client (HTTP/2, pooled connections) running on its own
+    event loop thread. Async callers use fetch_async / fetch_many; synchronous
+    callers such as Flask routes and crawler threads use fetch.
+    All per-host state is only touched from the loop thread.
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, _HostState] = {}
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    self._client = httpx.AsyncClient(
+                        http2=True,
+                        follow_redirects=True,
+                        headers={'User-Agent': USER_AGENT},
+                        limits=httpx.Limits(
+                            max_connections=MAX_CONNECTIONS,
+                            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS
+                        )
+                    )
+                    ready.set()
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=run, name='fetch-engine', daemon=True)
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    def _host(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState()
+        return state
+
+    def _check_circuit(self, host: str, state: _HostState) -> bool:
+        """Raise while the circuit is open; returns True if this request is the half-open probe"""
+        if not state.open_until:
+            return False
+        if time.monotonic() < state.open_until or state.probing:
+            raise CircuitOpenError(f"{host} は一時的に停止中です（連続 {state.failures} 回失敗）")
+        # クールダウン経過後は1件だけ試行を通す（half-open）
+        state.probing = True
+        return True
+
+    def _record_success(self, state: _HostState) -> None:
+        state.failures = 0
+        state.open_until = 0.0
+        state.probing = False
+
+    def _record_failure(self, host: str, state: _HostState) -> None:
+        state.failures += 1
+        state.probing = False
+        if state.failures >= CIRCUIT_FAILURE_THRESHOLD:
+            state.open_until = time.monotonic() + CIRCUIT_COOLDOWN
+            logging.warning(f"Circuit opened for {host} after {state.failures} failures")
+
+    async def fetch_async(self, url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        """
+        GET url with this host's adaptive timeouts; the body is fully read before returning.
+        Can be awaited from any event loop; the request itself always runs on the engine loop.
+        """
+        loop = self._ensure_loop()
+        if asyncio.get_running_loop() is not loop:
+            return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._fetch(url, headers), loop))
+        return await self._fetch(url, headers)
+
+    async def _fetch(self, url: str, headers: Optional[Dict[str, str]]) -> httpx.Response:
+        host = urlparse(url).netloc.lower()
+        state = self._host(host)
+        probe = self._check_circuit(host, state)
+        try:
+            return await self._request(url, headers, host, state)
+        finally:
+            # 接続待ちのタイムアウトやリダイレクト過多、キャンセルなど成否を記録しない
+            # 終わり方でも試行中の状態を解除し、次のリクエストを試行として通す
+            if probe:
+                state.probing = False
+
+    async def _request(self, url: str, headers: Optional[Dict[str, str]],
+                       host: str, state: _HostState) -> httpx.Response:
+        connect_timeout = state.connect.timeout()
+        read_timeout = state.read.timeout()
+        timings: Dict[str, float] = {}
+
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            # 例: "http2.receive_response_headers.started" -> "receive_response_headers.started"
+            timings[event_name.split('.', 1)[-1]] = time.monotonic()
+
+        try:
+            response = await self._client.get(
+                url,
+                headers=headers,
+                timeout=httpx.Timeout(connect=connect_timeout, read=read_timeout,
+                                      write=read_timeout, pool=connect_timeout),
+                extensions={'trace': trace}
+            )
+        except httpx.PoolTimeout:
+            # 自プロセス側の接続待ちなのでホストの失敗には数えない
+            raise
+        except httpx.ConnectTimeout:
+            state.connect.observe(connect_timeout)
+            self._record_failure(host, state)
+            raise
+        except httpx.ReadTimeout:
+            state.read.observe(read_timeout)
+            self._record_failure(host, state)
+            raise
+        except httpx.TransportError:
+            self._record_failure(host, state)
+            raise
+
+        # 接続（TCP + TLS）と最初のレスポンスヘッダーまでの時間を個別に学習する
+        connect_start = timings.get('connect_tcp.started')
+        connect_end = timings.get('start_tls.complete') or timings.get('connect_tcp.complete')
+        if connect_start and connect_end:
+            state.connect.observe(connect_end - connect_start)
+        headers_start = timings.get('receive_response_headers.started')
+        headers_end = timings.get('receive_response_headers.complete')
+        if headers_start and headers_end:
+            state.read.observe(headers_end - headers_start)
+
+        if response.status_code >= 500:
+            self._record_failure(host, state)
+        else:
+            self._record_success(state)
+        return response
+
+    async def _gather(self, urls: List[str]) -> List[Union[httpx.Response, Exception]]:
+        return await asyncio.gather(*(self._fetch(url, None) for url in urls), return_exceptions=True)
+
+    def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        """Blocking fetch for synchronous callers"""
+        loop = self._ensure_loop()
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("fetch() cannot be called from the engine loop; await fetch_async()")
+        return asyncio.run_coroutine_threadsafe(self._fetch(url, headers), loop).result()
+
+    def fetch_many(self, urls: List[str]) -> List[Union[httpx.Response, Exception]]:
+        """Fetch many URLs concurrently; failures are returned in place of responses"""
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(self._gather(urls), loop).result()
+
+    def host_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {host: state.to_dict() for host, state in list(self._hosts.items())}
+
+
+engine = FetchEngine()
@@ -0,0 +1,68 @@
+import re
+import hashlib
+import unicodedata
+from collections import Counter
+from typing import Dict, Optional, Any
+from bs4 import BeautifulSoup
+
+SIMHASH_BITS = 64
+SHINGLE_SIZE = 3
+
+
+def html_to_text(content: Optional[str]) -> str:
+    """Extract visible text from stored content HTML"""
+    if not content:
+        return ""
+    return BeautifulSoup(content, 'html.parser').get_text('\n')
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """NFKC-normalize, lowercase and collapse whitespace so cosmetic changes do not count as edits"""
+    if not text:
+        return ""
+    text = unicodedata.normalize('NFKC', text).lower()
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def content_hash(title: Optional[str], description: Optional[str], body_text: Optional[str]) -> str:
+    """SHA-256 of the normalized title, description and body text"""
+    parts = [normalize_text(title), normalize_text(description), normalize_text(body_text)]
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+def _features(text: str) -> Counter:
+    # 日本語は空白で区切られないため、空白を除いた文字 n-gram を特徴量とする
+    compact = text.replace(' ', '')
+    if len(compact) < SHINGLE_SIZE:
+        return Counter([compact]) if compact else Counter()
+    return Counter(compact[i:i + SHINGLE_SIZE] for i in range(len(compact) - SHINGLE_SIZE + 1))
+
+
+def simhash(text: str) -> str:
+    """64-bit SimHash of normalized text, as 16 hex characters"""
+    weights = [0] * SIMHASH_BITS
+    for feature, count in _features(normalize_text(text)).items():
+        h = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += count if h >> bit & 1 else -count
+
+    value = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            value |= 1 << bit
+    return f"{value:016x}"
+
+
+def hamming_distance(a: Optional[str], b: Optional[str]) -> Optional[int]:
+    if not a or not b:
+        return None
+    return bin(int(a, 16) ^ int(b, 16)).count('1')
+
+
+def fingerprint(title: Optional[str], description: Optional[str], content: Optional[str]) -> Dict[str, Any]:
+    """Fingerprint of a scraped page; `content` is the extracted HTML"""
+    body_text = html_to_text(content)
+    return {
+        'content_hash': content_hash(title, description, body_text),
+        'simhash': simhash(body_text)
+    }
@@ -0,0 +1,167 @@
+import os
+import zlib
+import hashlib
+import logging
+from array import array
+from typing import Dict, List, Optional, Any
+
+from sqlalchemy import delete, func, insert
+from models import MinHashBucket, ScrapedContent, db
+from services.fingerprint import html_to_text, normalize_text
+
+NUM_PERM = 128
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+NEAR_DUPLICATE_THRESHOLD = float(os.environ.get('NEAR_DUPLICATE_THRESHOLD', '0.8'))
+
+_MAX_HASH = (1 << 32) - 1
+_MIX = 0x9E3779B97F4A7C15
+_BIN_SHIFT = 64 - (NUM_PERM - 1).bit_length()
+
+
+def _shingle_hashes(text: str) -> set:
+    # 日本語にも対応できるよう、空白を除いた文字 n-gram を使う
+    compact = normalize_text(text).replace(' ', '')
+    if not compact:
+        return set()
+    if len(compact) <= SHINGLE_SIZE:
+        return {zlib.crc32(compact.encode('utf-8'))}
+    return {
+        zlib.crc32(compact[i:i + SHINGLE_SIZE].encode('utf-8'))
+        for i in range(len(compact) - SHINGLE_SIZE + 1)
+    }
+
+
+def compute_signature(text: str) -> Optional[List[int]]:
+    """
+    MinHash signature of the text, or None when there is nothing to hash.
+    Uses one-permutation hashing: each shingle is hashed once and assigned to one of
+    NUM_PERM bins, so the cost is linear in the text length rather than NUM_PERM times it.
+    Empty bins borrow from the next non-empty bin (rotation densification).
+    """
+    hashes = _shingle_hashes(text)
+    if not hashes:
+        return None
+
+    bins: List[Optional[int]] = [None] * NUM_PERM
+    for value in hashes:
+        mixed = (value * _MIX) & 0xFFFFFFFFFFFFFFFF
+        index = mixed >> _BIN_SHIFT
+        low = mixed & _MAX_HASH
+        current = bins[index]
+        if current is None or low < current:
+            bins[index] = low
+
+    signature = []
+    for index in range(NUM_PERM):
+        steps = 0
+        value = bins[index]
+        while value is None:
+            steps += 1
+            value = bins[(index + steps) % NUM_PERM]
+        signature.append((value + steps * 0x9E3779B1) & _MAX_HASH)
+    return signature
+
+
+def pack_signature(signature: List[int]) -> bytes:
+    return array('I', signature).tobytes()
+
+
+def unpack_signature(data: bytes) -> List[int]:
+    signature = array('I')
+    signature.frombytes(data)
+    return signature.tolist()
+
+
+def estimate_similarity(a: List[int], b: List[int]) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+def band_keys(signature: List[int]) -> List[int]:
+    """One LSH bucket key per band; the band index is mixed in so bands never collide"""
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(
+            band.to_bytes(2, 'big') + array('I', rows).tobytes(),
+            digest_size=8
+        ).digest()
+        keys.append(int.from_bytes(digest, 'big', signed=True))
+    return keys
+
+
+def index_content(content: ScrapedContent, commit: bool = True) -> Optional[List[int]]:
+    """Compute and store the signature of a row and (re)write its LSH buckets"""
+    signature = compute_signature(html_to_text(content.content))
+    content.minhash = pack_signature(signature) if signature else None
+
+    db.session.execute(delete(MinHashBucket).where(MinHashBucket.content_id == content.id))
+    if signature:
+        db.session.execute(
+            insert(MinHashBucket),
+            [{'bucket': key, 'content_id': content.id} for key in set(band_keys(signature))]
+        )
+    if commit:
+        db.session.commit()
+    return signature
+
+
+def find_near_duplicates(signature: Optional[List[int]],
+                         exclude_id: Optional[int] = None,
+                         threshold: float = NEAR_DUPLICATE_THRESHOLD,
+                         limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    Look up rows sharing at least one LSH bucket with the signature and return those
+    whose estimated similarity is at or above the threshold, most similar first.
+    """
+    if not signature:
+        return []
+
+    query = db.session.query(MinHashBucket.content_id) \
+        .filter(MinHashBucket.bucket.in_(band_keys(signature)))
+    if exclude_id is not None:
+        query = query.filter(MinHashBucket.content_id != exclude_id)
+    candidate_ids = [row[0] for row in query.group_by(MinHashBucket.content_id)]
+    if not candidate_ids:
+        return []
+
+    matches = []
+    rows = db.session.query(ScrapedContent.id, ScrapedContent.url, ScrapedContent.minhash) \
+        .filter(ScrapedContent.id.in_(candidate_ids))
+    for content_id, url, packed in rows:
+        if not packed:
+            continue
+        similarity = estimate_similarity(signature, unpack_signature(packed))
+        if similarity >= threshold:
+            matches.append({'id': content_id, 'url': url, 'similarity': round(similarity, 3)})
+
+    matches.sort(key=lambda match: match['similarity'], reverse=True)
+    return matches[:limit]
+
+
+def backfill(batch_size: int = 500) -> int:
+    """Index every row that does not have a signature yet; returns the number indexed"""
+    indexed = 0
+    cursor = 0
+    while True:
+        rows = ScrapedContent.query \
+            .filter(ScrapedContent.minhash.is_(None), ScrapedContent.id > cursor) \
+            .order_by(ScrapedContent.id) \
+            .limit(batch_size) \
+            .all()
+        if not rows:
+            break
+        for content in rows:
+            index_content(content, commit=False)
+            cursor = content.id
+        db.session.commit()
+        db.session.expunge_all()
+        indexed += len(rows)
+        logging.info(f"MinHash backfill: {indexed} row(s) indexed")
+    return indexed
+
+
+def index_size() -> int:
+    return db.session.query(func.count(func.distinct(MinHashBucket.content_id))).scalar() or 0
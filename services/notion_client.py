@@ -1,11 +1,31 @@
 from notion_client import Client
 import os
+import re
 import logging
-from typing import Dict, Any, Optional
+import difflib
+from typing import Dict, Any, List, Optional, Tuple
 import traceback
 from datetime import datetime
+from bs4 import BeautifulSoup
+from services.rate_limit import RateLimiter
 
-notion = Client(auth=os.environ["NOTION_TOKEN"])
+# Notion API の平均レート上限は 1 インテグレーションあたり毎秒 3 リクエスト
+NOTION_REQUESTS_PER_SECOND = float(os.environ.get('NOTION_REQUESTS_PER_SECOND', '3'))
+
+
+class _RateLimitedClient(Client):
+    """Notion client whose every API request waits on one process-wide rate limiter"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.limiter = RateLimiter.per_second(NOTION_REQUESTS_PER_SECOND)
+
+    def request(self, *args, **kwargs):
+        self.limiter.wait()
+        return super().request(*args, **kwargs)
+
+
+notion = _RateLimitedClient(auth=os.environ["NOTION_TOKEN"])
 
 def get_database_properties() -> Dict[str, Any]:
     """
@@ -146,91 +166,283 @@ def get_database_properties() -> Dict[str, Any]:
             "details": error_msg
         }
 
-def create_notion_page(content: Any, properties: Dict[str, Any]) -> Dict[str, Any]:
-    """Create a new page in Notion with the given content and properties"""
+BLOCK_TAG_TYPES = {
+    "h1": "heading_1",
+    "h2": "heading_2",
+    "h3": "heading_3",
+    "h4": "heading_3",
+    "h5": "heading_3",
+    "h6": "heading_3",
+    "p": "paragraph",
+    "li": "bulleted_list_item",
+    "blockquote": "quote",
+    "pre": "paragraph"
+}
+MAX_TEXT_LENGTH = 2000
+MAX_RICH_TEXT_ITEMS = 100
+MAX_CHILDREN_PER_REQUEST = 100
+URL_FILTER_CHUNK = 50
+
+
+class _FullReplaceRequired(Exception):
+    """Blocks cannot be inserted before the first existing child, so the body has to be rewritten"""
+
+
+def _rich_text(text: str) -> list:
+    chunks = [text[i:i + MAX_TEXT_LENGTH] for i in range(0, len(text), MAX_TEXT_LENGTH)]
+    return [{"type": "text", "text": {"content": chunk}} for chunk in chunks[:MAX_RICH_TEXT_ITEMS]]
+
+
+def content_to_blocks(html_content: Optional[str]) -> List[Dict[str, Any]]:
+    """Convert extracted article HTML into Notion blocks, one per top-level text element"""
+    if not html_content:
+        return []
+
+    soup = BeautifulSoup(html_content, "html.parser")
+    blocks = []
+    for element in soup.find_all(list(BLOCK_TAG_TYPES.keys())):
+        # 入れ子（li 内の p など）は外側の要素でまとめて扱う
+        if element.find_parent(list(BLOCK_TAG_TYPES.keys())):
+            continue
+        text = re.sub(r"\s+", " ", element.get_text(" ")).strip()
+        if not text:
+            continue
+        block_type = BLOCK_TAG_TYPES[element.name]
+        if element.name == "li" and element.parent and element.parent.name == "ol":
+            block_type = "numbered_list_item"
+        blocks.append({
+            "object": "block",
+            "type": block_type,
+            block_type: {"rich_text": _rich_text(text)}
+        })
+
+    if not blocks:
+        # ブロック要素がない場合は行単位で段落にする
+        for line in soup.get_text("\n").split("\n"):
+            line = line.strip()
+            if line:
+                blocks.append({
+                    "object": "block",
+                    "type": "paragraph",
+                    "paragraph": {"rich_text": _rich_text(line)}
+                })
+    return blocks
+
+
+def _block_key(block: Dict[str, Any]) -> Tuple[str, str]:
+    block_type = block.get("type", "")
+    body = block.get(block_type)
+    rich_text = body.get("rich_text", []) if isinstance(body, dict) else []
+    text = "".join(
+        item.get("plain_text") or item.get("text", {}).get("content", "")
+        for item in rich_text
+    )
+    return block_type, text
+
+
+def _list_children(block_id: str) -> List[Dict[str, Any]]:
+    children = []
+    cursor = None
+    while True:
+        kwargs = {"block_id": block_id, "page_size": 100}
+        if cursor:
+            kwargs["start_cursor"] = cursor
+        response = notion.blocks.children.list(**kwargs)
+        children.extend(response.get("results", []))
+        if not response.get("has_more"):
+            return children
+        cursor = response.get("next_cursor")
+
+
+def _append_children(block_id: str, blocks: List[Dict[str, Any]], after: Optional[str] = None) -> Optional[str]:
+    """Append blocks in batches of 100; returns the id of the last block written"""
+    last_id = after
+    for i in range(0, len(blocks), MAX_CHILDREN_PER_REQUEST):
+        kwargs = {"block_id": block_id, "children": blocks[i:i + MAX_CHILDREN_PER_REQUEST]}
+        if last_id:
+            kwargs["after"] = last_id
+        results = notion.blocks.children.append(**kwargs).get("results", [])
+        if results:
+            if "after" in kwargs:
+                last_id = _last_inserted_id(results, kwargs["after"], len(kwargs["children"]))
+            else:
+                last_id = results[-1]["id"]
+    return last_id
+
+
+def _last_inserted_id(results: List[Dict[str, Any]], after: str, count: int) -> str:
+    # after 指定時、レスポンスには親の子ブロックが含まれるため挿入位置から数える
+    ids = [block["id"] for block in results]
+    if after in ids:
+        index = ids.index(after) + count
+        if index < len(ids):
+            return ids[index]
+    return ids[-1]
+
+
+def _sync_blocks(page_id: str, new_blocks: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Bring the page body in line with new_blocks, touching only blocks that changed:
+    unchanged blocks are kept, same-type edits are updated in place, and the rest
+    are deleted or inserted at their position.
+    """
+    old_blocks = _list_children(page_id)
+    old_keys = [_block_key(block) for block in old_blocks]
+    new_keys = [_block_key(block) for block in new_blocks]
+    stats = {"kept": 0, "updated": 0, "deleted": 0, "inserted": 0}
+
+    try:
+        prev_id = None
+        matcher = difflib.SequenceMatcher(a=old_keys, b=new_keys, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                stats["kept"] += i2 - i1
+                prev_id = old_blocks[i2 - 1]["id"]
+                continue
+
+            olds = old_blocks[i1:i2]
+            news = new_blocks[j1:j2]
+            pending: List[Dict[str, Any]] = []
+
+            def flush(next_old: int):
+                nonlocal prev_id
+                if not pending:
+                    return
+                # 先頭に挿入する場合、後ろに既存ブロックが残っていると位置を指定できない
+                if prev_id is None and (i1 + next_old < i2 or i2 < len(old_blocks)):
+                    raise _FullReplaceRequired()
+                prev_id = _append_children(page_id, pending, after=prev_id)
+                stats["inserted"] += len(pending)
+                pending.clear()
+
+            for k in range(max(len(olds), len(news))):
+                old = olds[k] if k < len(olds) else None
+                new = news[k] if k < len(news) else None
+                if old and new and old["type"] == new["type"]:
+                    flush(k)
+                    notion.blocks.update(block_id=old["id"], **{new["type"]: new[new["type"]]})
+                    prev_id = old["id"]
+                    stats["updated"] += 1
+                    continue
+                if old:
+                    notion.blocks.delete(block_id=old["id"])
+                    stats["deleted"] += 1
+                if new:
+                    pending.append(new)
+            flush(len(olds))
+    except _FullReplaceRequired:
+        logging.info(f"先頭への挿入が必要なため本文を全て置き換えます: {page_id}")
+        for block in _list_children(page_id):
+            notion.blocks.delete(block_id=block["id"])
+        _append_children(page_id, new_blocks)
+        stats = {"kept": 0, "updated": 0, "deleted": len(old_blocks), "inserted": len(new_blocks)}
+
+    return stats
+
+
+def _content_properties(content: Any) -> Dict[str, Any]:
+    """Properties derived from the scraped content itself"""
+    return {
+        "titlename": {
+            "title": [{"text": {"content": content.title or ""}}]
+        },
+        "発言者": {
+            "rich_text": [{"text": {"content": content.author or content.site_name or ""}}]
+        },
+        "URL": {
+            "url": content.url
+        },
+        "Content": {
+            "rich_text": [{"text": {"content": content.content[:2000] if content.content else ""}}]
+        }
+    }
+
+
+def _format_custom_properties(properties: Dict[str, Any], valid_props: Dict[str, Any],
+                              reserved: set) -> Dict[str, Any]:
+    """Convert form values into Notion property payloads, skipping reserved and unknown names"""
+    formatted = {}
+    for prop_name, prop_value in properties.items():
+        if prop_name in reserved:
+            continue
+
+        if prop_name not in valid_props:
+            logging.warning(f"無効なプロパティをスキップ: {prop_name}")
+            continue
+
+        prop_type = valid_props[prop_name]["type"]
+        try:
+            if isinstance(prop_value, dict):
+                formatted[prop_name] = prop_value
+            else:
+                # Default handling for string values
+                if prop_type == "rich_text":
+                    formatted[prop_name] = {
+                        "rich_text": [{"text": {"content": str(prop_value)}}]
+                    }
+                elif prop_type == "select":
+                    formatted[prop_name] = {
+                        "select": {"name": str(prop_value)}
+                    }
+                elif prop_type == "date":
+                    formatted[prop_name] = {
+                        "date": {"start": str(prop_value)}
+                    }
+                elif prop_type == "relation_select":
+                    formatted[prop_name] = {
+                        "relation": [{"id": str(prop_value)}]
+                    }
+        except Exception as e:
+            logging.error(f"プロパティのフォーマットエラー {prop_name}: {str(e)}")
+            continue
+    return formatted
+
+
+def create_notion_page(content: Any, properties: Dict[str, Any],
+                       valid_props: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Create a new page in Notion with the given content and properties.
+    Pass valid_props (the data of get_database_properties) to skip fetching the schema again.
+    """
     try:
         database_id = os.environ.get("NOTION_DATABASE_ID")
         if not database_id:
             raise ValueError("NOTION_DATABASE_IDが設定されていません")
         
         # Validate properties
-        database_props = get_database_properties()
-        if database_props["status"] == "error":
-            raise ValueError(f"データベースプロパティの取得に失敗: {database_props['error']}")
-        
-        valid_props = database_props["data"]
+        if valid_props is None:
+            database_props = get_database_properties()
+            if database_props["status"] == "error":
+                raise ValueError(f"データベースプロパティの取得に失敗: {database_props['error']}")
+            valid_props = database_props["data"]
         
         # Prepare automatic property mappings with enhanced error handling
         current_time = datetime.now().isoformat()
         auto_properties = {
-            "titlename": {
-                "title": [{"text": {"content": content.title or ""}}]
-            },
+            **_content_properties(content),
             "日付": {
                 "date": {"start": current_time}
             },
             "作成日時": {
                 "created_time": current_time
-            },
-            "発言者": {
-                "rich_text": [{"text": {"content": content.author or content.site_name or ""}}]
-            },
-            "URL": {
-                "url": content.url
             }
         }
         
         # Prepare page content
+        blocks = content_to_blocks(content.content)
         page_content = {
             "parent": {"database_id": database_id},
             "properties": {
                 **auto_properties,
-                "URL": {
-                    "url": content.url
-                },
-                "Content": {
-                    "rich_text": [{"text": {"content": content.content[:2000] if content.content else ""}}]
-                }
-            }
+                **_format_custom_properties(properties, valid_props, set(auto_properties))
+            },
+            "children": blocks[:MAX_CHILDREN_PER_REQUEST]
         }
         
-        # Add custom properties with validation
-        for prop_name, prop_value in properties.items():
-            if prop_name in ["URL", "Content"] or prop_name in auto_properties:
-                continue
-                
-            if prop_name not in valid_props:
-                logging.warning(f"無効なプロパティをスキップ: {prop_name}")
-                continue
-                
-            prop_type = valid_props[prop_name]["type"]
-            try:
-                if isinstance(prop_value, dict):
-                    page_content["properties"][prop_name] = prop_value
-                else:
-                    # Default handling for string values
-                    if prop_type == "rich_text":
-                        page_content["properties"][prop_name] = {
-                            "rich_text": [{"text": {"content": str(prop_value)}}]
-                        }
-                    elif prop_type == "select":
-                        page_content["properties"][prop_name] = {
-                            "select": {"name": str(prop_value)}
-                        }
-                    elif prop_type == "date":
-                        page_content["properties"][prop_name] = {
-                            "date": {"start": str(prop_value)}
-                        }
-                    elif prop_type == "relation_select":
-                        page_content["properties"][prop_name] = {
-                            "relation": [{"id": str(prop_value)}]
-                        }
-            except Exception as e:
-                logging.error(f"プロパティのフォーマットエラー {prop_name}: {str(e)}")
-                continue
-        
         # Create page
         response = notion.pages.create(**page_content)
+        if len(blocks) > MAX_CHILDREN_PER_REQUEST:
+            _append_children(response["id"], blocks[MAX_CHILDREN_PER_REQUEST:])
         return {
             "status": "success",
             "data": {
@@ -255,3 +467,78 @@ def create_notion_page(content: Any, properties: Dict[str, Any]) -> Dict[str, An
             "type": "system_error",
             "details": error_msg
         }
+
+
+def update_notion_page(content: Any, properties: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Update the Notion page already linked to this content instead of creating a duplicate.
+    Content-derived properties are refreshed and only changed body blocks are rewritten.
+    """
+    try:
+        if not content.notion_page_id:
+            raise ValueError("Notionページが未作成です")
+
+        page_properties = _content_properties(content)
+        if properties:
+            database_props = get_database_properties()
+            if database_props["status"] == "error":
+                raise ValueError(f"データベースプロパティの取得に失敗: {database_props['error']}")
+            reserved = set(page_properties) | {"日付", "作成日時"}
+            page_properties.update(_format_custom_properties(properties, database_props["data"], reserved))
+
+        notion.pages.update(page_id=content.notion_page_id, properties=page_properties)
+        block_stats = _sync_blocks(content.notion_page_id, content_to_blocks(content.content))
+        logging.info(f"Notionページを更新しました {content.notion_page_id}: {block_stats}")
+
+        return {
+            "status": "success",
+            "data": {
+                "page_id": content.notion_page_id,
+                "updated": True,
+                "blocks": block_stats
+            }
+        }
+    except ValueError as ve:
+        error_msg = str(ve)
+        logging.error(f"バリデーションエラー: {error_msg}")
+        return {
+            "status": "error",
+            "error": error_msg,
+            "type": "validation_error"
+        }
+    except Exception as e:
+        error_msg = str(e)
+        logging.error(f"Notionページ更新エラー: {error_msg}")
+        logging.error(f"トレースバック: {traceback.format_exc()}")
+        return {
+            "status": "error",
+            "error": "Notionページの更新に失敗しました",
+            "type": "system_error",
+            "details": error_msg
+        }
+
+
+def find_pages_by_url(urls: List[str]) -> Dict[str, str]:
+    """Return {url: page_id} for pages in the database whose URL property matches one of urls"""
+    database_id = os.environ.get("NOTION_DATABASE_ID")
+    if not database_id:
+        raise ValueError("NOTION_DATABASE_IDが設定されていません")
+
+    found = {}
+    for i in range(0, len(urls), URL_FILTER_CHUNK):
+        chunk = urls[i:i + URL_FILTER_CHUNK]
+        query = {
+            "database_id": database_id,
+            "filter": {"or": [{"property": "URL", "url": {"equals": url}} for url in chunk]},
+            "page_size": 100
+        }
+        while True:
+            response = notion.databases.query(**query)
+            for page in response.get("results", []):
+                url = page.get("properties", {}).get("URL", {}).get("url")
+                if url and url not in found:
+                    found[url] = page["id"]
+            if not response.get("has_more"):
+                break
+            query["start_cursor"] = response.get("next_cursor")
+    return found
@@ -0,0 +1,131 @@
+import os
+import time
+import logging
+import traceback
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional
+
+from models import JobCheckpoint, ScrapedContent, db
+from services.notion_client import create_notion_page, find_pages_by_url, get_database_properties
+
+CHECKPOINT_NAME = 'notion_sync'
+NOTION_SYNC_WORKERS = int(os.environ.get('NOTION_SYNC_WORKERS', '3'))
+
+
+def _get_checkpoint() -> JobCheckpoint:
+    checkpoint = db.session.get(JobCheckpoint, CHECKPOINT_NAME)
+    if checkpoint is None:
+        checkpoint = JobCheckpoint(name=CHECKPOINT_NAME, last_id=0)
+        db.session.add(checkpoint)
+        db.session.commit()
+    return checkpoint
+
+
+def _snapshot(content: ScrapedContent) -> SimpleNamespace:
+    # ワーカースレッドにはセッションに紐づかない値だけを渡す
+    return SimpleNamespace(
+        id=content.id,
+        url=content.url,
+        title=content.title,
+        author=content.author,
+        site_name=content.site_name,
+        content=content.content
+    )
+
+
+def sync_unsynced(batch_size: int = 50,
+                  workers: int = NOTION_SYNC_WORKERS,
+                  limit: Optional[int] = None,
+                  properties: Optional[Dict[str, Any]] = None,
+                  restart: bool = False) -> Dict[str, Any]:
+    """
+    Create Notion pages for rows without notion_page_id.
+
+    Each batch fetches the database schema once, links rows whose URL already exists
+    in the database instead of creating them again, and creates one page per remaining URL
+    concurrently under the Notion client's shared rate limit. notion_page_id is committed as
+    each page is created and the checkpoint advances after each batch, so a crashed run
+    resumes where it stopped.
+    """
+    properties = properties or {}
+    checkpoint = _get_checkpoint()
+    if restart:
+        checkpoint.last_id = 0
+        db.session.commit()
+
+    stats = {'created': 0, 'linked': 0, 'failed': 0}
+    started = time.monotonic()
+
+    def create(snapshot: SimpleNamespace, valid_props: Dict[str, Any]) -> Dict[str, Any]:
+        return create_notion_page(snapshot, properties, valid_props=valid_props)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        while limit is None or sum(stats.values()) < limit:
+            size = batch_size if limit is None else min(batch_size, limit - sum(stats.values()))
+            rows: List[ScrapedContent] = ScrapedContent.query \
+                .filter(ScrapedContent.notion_page_id.is_(None), ScrapedContent.id > checkpoint.last_id) \
+                .order_by(ScrapedContent.id) \
+                .limit(size) \
+                .all()
+            if not rows:
+                break
+
+            database_props = get_database_properties()
+            if database_props["status"] == "error":
+                raise ValueError(f"データベースプロパティの取得に失敗: {database_props['error']}")
+            valid_props = database_props["data"]
+
+            # 前回の実行で作成済み（ID 保存前に中断）のページは作り直さずに紐づける
+            existing = find_pages_by_url(list({row.url for row in rows}))
+            # 同じ URL の行が複数ある場合（以前は抽出のたびに行が増えていた）はページを1つだけ作る
+            pending: Dict[str, List[ScrapedContent]] = {}
+            for row in rows:
+                if row.url in existing:
+                    row.notion_page_id = existing[row.url]
+                    stats['linked'] += 1
+                else:
+                    pending.setdefault(row.url, []).append(row)
+            db.session.commit()
+
+            # 最新の行（ID が最大）の内容でページを作成する
+            futures = {executor.submit(create, _snapshot(group[-1]), valid_props): group
+                       for group in pending.values()}
+            for future in as_completed(futures):
+                group = futures[future]
+                row = group[-1]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logging.error(f"Notion sync error for content {row.id}: {str(e)}")
+                    logging.error(f"Traceback: {traceback.format_exc()}")
+                    result = {"status": "error", "error": str(e)}
+
+                if result["status"] == "success":
+                    for member in group:
+                        member.notion_page_id = result["data"]["page_id"]
+                    db.session.commit()
+                    stats['created'] += 1
+                    stats['linked'] += len(group) - 1
+                else:
+                    logging.error(f"Notion sync failed for content {row.id}: {result['error']}")
+                    stats['failed'] += len(group)
+
+            checkpoint.last_id = rows[-1].id
+            db.session.commit()
+            db.session.expunge_all()
+            checkpoint = _get_checkpoint()
+
+            elapsed = time.monotonic() - started
+            logging.info(
+                f"Notion sync: created={stats['created']} linked={stats['linked']} failed={stats['failed']} "
+                f"({stats['created'] / elapsed if elapsed else 0:.2f} pages/s)"
+            )
+
+    elapsed = time.monotonic() - started
+    return {
+        **stats,
+        'last_id': checkpoint.last_id,
+        'elapsed_seconds': round(elapsed, 2),
+        'pages_per_second': round(stats['created'] / elapsed, 2) if elapsed else 0.0
+    }
@@ -0,0 +1,161 @@
+import io
+import os
+import logging
+import threading
+import traceback
+from concurrent.futures import CancelledError, ProcessPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import context, forkserver, popen_forkserver, reduction, spawn, util
+from typing import Dict, Optional, Tuple
+
+# 0 のときはプロセスプールを使わず、リクエストスレッド内でパースする
+PARSE_WORKERS = int(os.environ.get('SCRAPER_PARSE_WORKERS', '0'))
+PARSE_TIMEOUT = float(os.environ.get('SCRAPER_PARSE_TIMEOUT', '20'))
+MAX_TASKS_PER_CHILD = int(os.environ.get('SCRAPER_PARSE_MAX_TASKS_PER_CHILD', '50'))
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+class ParseTimeoutError(Exception):
+    """Raised when a page could not be parsed within SCRAPER_PARSE_TIMEOUT"""
+
+
+class _WorkerPopen(popen_forkserver.Popen):
+    """
+    Forkserver launcher that does not re-run the parent's __main__ in the worker.
+    By default every worker executes the start script (main.py / app.py) as
+    __mp_main__, which would build the Flask app and touch the database each time
+    a worker is (re)started. Tasks only reference services.parse_executor, so the
+    worker never needs the main module.
+    """
+
+    def _launch(self, process_obj):
+        prep_data = spawn.get_preparation_data(process_obj._name)
+        prep_data.pop('init_main_from_path', None)
+        prep_data.pop('init_main_from_name', None)
+        buf = io.BytesIO()
+        context.set_spawning_popen(self)
+        try:
+            reduction.dump(prep_data, buf)
+            reduction.dump(process_obj, buf)
+        finally:
+            context.set_spawning_popen(None)
+
+        self.sentinel, w = forkserver.connect_to_new_process(self._fds)
+        _parent_w = os.dup(w)
+        self.finalizer = util.Finalize(self, util.close_fds, (_parent_w, self.sentinel))
+        with open(w, 'wb', closefd=True) as f:
+            f.write(buf.getbuffer())
+        self.pid = forkserver.read_signed(self.sentinel)
+
+
+class _WorkerProcess(context.ForkServerProcess):
+    @staticmethod
+    def _Popen(process_obj):
+        return _WorkerPopen(process_obj)
+
+
+class _WorkerContext(context.ForkServerContext):
+    Process = _WorkerProcess
+
+
+def _warm_worker() -> int:
+    """Import the parsing stack so the first real task does not pay for it"""
+    import bs4  # noqa: F401
+    import services.scraper  # noqa: F401
+    return os.getpid()
+
+
+def parse_html(html_bytes: bytes, encoding: Optional[str], url: str) -> Tuple[Dict[str, str], str]:
+    """
+    Parse raw HTML and return (metadata, content).
+    Runs inside a pool worker, so only bytes go in and plain dicts/strings come out.
+    """
+    from bs4 import BeautifulSoup
+    from services.scraper import extract_metadata, extract_main_content
+
+    if encoding:
+        soup = BeautifulSoup(html_bytes.decode(encoding, errors='replace'), 'html.parser')
+    else:
+        # 文字コード不明の場合は BeautifulSoup の自動判定に任せる
+        soup = BeautifulSoup(html_bytes, 'html.parser')
+
+    metadata = extract_metadata(soup, url)
+    content = extract_main_content(soup, url)
+    return metadata, content
+
+
+def get_executor() -> Optional[ProcessPoolExecutor]:
+    """Return the shared parsing pool, creating and warming it on first use"""
+    global _executor
+    if PARSE_WORKERS <= 0:
+        return None
+
+    with _executor_lock:
+        if _executor is None:
+            # max_tasks_per_child は fork と併用できないため forkserver を使う。
+            # 解析用のモジュールは forkserver で一度だけ読み込み、各ワーカーは fork で引き継ぐ
+            mp_context = _WorkerContext()
+            mp_context.set_forkserver_preload(['services.scraper'])
+            _executor = ProcessPoolExecutor(
+                max_workers=PARSE_WORKERS,
+                mp_context=mp_context,
+                max_tasks_per_child=MAX_TASKS_PER_CHILD
+            )
+            # ワーカーを事前に起動してインポートを済ませておく
+            futures = [_executor.submit(_warm_worker) for _ in range(PARSE_WORKERS)]
+            done, not_done = wait(futures, timeout=PARSE_TIMEOUT)
+            pids = {f.result() for f in done if f.exception() is None}
+            if not_done:
+                logging.warning(f"Parse executor warm-up timed out ({len(not_done)} worker(s) not ready)")
+            logging.info(f"Parse executor started with {len(pids)} worker(s)")
+        return _executor
+
+
+def _discard_executor(executor: ProcessPoolExecutor) -> None:
+    """Kill every worker of a stuck pool so a new one is created on the next call"""
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+
+    # ProcessPoolExecutor cannot cancel a running task, so terminate the workers directly
+    for process in list((executor._processes or {}).values()):
+        try:
+            process.kill()
+        except Exception as e:
+            logging.error(f"Error killing parse worker {process.pid}: {str(e)}")
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def run_parse(html_bytes: bytes, encoding: Optional[str], url: str) -> Tuple[Dict[str, str], str]:
+    """
+    Parse HTML in the process pool if enabled, otherwise in the calling thread.
+    A timed-out page takes its pool down with it; other pages that were in flight
+    on that pool are retried once on a fresh one.
+    """
+    for attempt in range(2):
+        executor = get_executor()
+        if executor is None:
+            return parse_html(html_bytes, encoding, url)
+
+        future = executor.submit(parse_html, html_bytes, encoding, url)
+        try:
+            return future.result(timeout=PARSE_TIMEOUT)
+        except FutureTimeoutError:
+            logging.error(f"Parsing timed out after {PARSE_TIMEOUT}s: {url}")
+            _discard_executor(executor)
+            raise ParseTimeoutError(f"HTMLの解析がタイムアウトしました ({PARSE_TIMEOUT}秒)")
+        except (BrokenProcessPool, CancelledError):
+            # 他のページのタイムアウトやワーカーの異常終了でプールごと停止された
+            _discard_executor(executor)
+            if attempt == 0:
+                logging.warning(f"Parse pool was restarted while parsing, retrying: {url}")
+                continue
+            logging.error(f"Parse worker died while parsing: {url}")
+            raise
+        except Exception as e:
+            logging.error(f"Parse worker error: {str(e)}")
+            logging.error(f"Traceback: {traceback.format_exc()}")
+            raise
@@ -0,0 +1,29 @@
+import time
+import threading
+
+
+class RateLimiter:
+    """Thread-safe limiter that spaces calls at least `interval` seconds apart"""
+
+    def __init__(self, interval: float):
+        self.interval = max(0.0, interval)
+        self._next_time = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_second(cls, rate: float) -> 'RateLimiter':
+        return cls(1.0 / rate if rate > 0 else 0.0)
+
+    def set_interval(self, interval: float) -> None:
+        with self._lock:
+            self.interval = max(0.0, interval)
+
+    def wait(self) -> None:
+        """Block until the caller is allowed to proceed"""
+        with self._lock:
+            now = time.monotonic()
+            scheduled = max(now, self._next_time)
+            self._next_time = scheduled + self.interval
+        delay = scheduled - now
+        if delay > 0:
+            time.sleep(delay)
@@ -1,4 +1,5 @@
-import requests
+import asyncio
+import httpx
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 from typing import Dict, Optional, Any
@@ -8,6 +9,8 @@ import re
 import traceback
 import json
 from datetime import datetime
+from services.parse_executor import run_parse
+from services.fetcher import engine as fetch_engine, CircuitOpenError
 
 def clean_text(text: Optional[str]) -> str:
     if not text:
@@ -142,43 +145,50 @@ def extract_main_content(soup: BeautifulSoup, url: str) -> str:
     # スタイルを維持したまま返す
     return str(main_content)
 
+def _build_result(url: str, response: httpx.Response) -> Dict[str, str]:
+    response.raise_for_status()
+
+    # Content-Type に charset がない場合は None を渡し、BeautifulSoup に判定させる
+    metadata, content = run_parse(response.content, response.charset_encoding, url)
+    
+    if not content:
+        raise Exception("メインコンテンツを抽出できませんでした")
+    
+    # データの検証とクリーニング
+    return {
+        'title': clean_text(metadata.get('title', '')),
+        'content': content,
+        'description': clean_text(metadata.get('description', '')),
+        'author': clean_text(metadata.get('author', '')),
+        'date': clean_text(metadata.get('date', '')),
+        'header_image': metadata.get('header_image', ''),
+        'site_name': clean_text(metadata.get('site_name', '')),
+        'url': url
+    }
+
 def scrape_url(url: str) -> Dict[str, str]:
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        
-        # エンコーディングの処理を改善
-        if response.encoding == 'ISO-8859-1':
-            response.encoding = response.apparent_encoding
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # メタデータとコンテンツの抽出
-        metadata = extract_metadata(soup, url)
-        content = extract_main_content(soup, url)
+        # 取得は共有の非同期エンジン（HTTP/2・ホストごとの適応タイムアウト・サーキットブレーカー）で行う
+        response = fetch_engine.fetch(url)
         
-        if not content:
-            raise Exception("メインコンテンツを抽出できませんでした")
-        
-        # データの検証とクリーニング
-        cleaned_data = {
-            'title': clean_text(metadata.get('title', '')),
-            'content': content,
-            'description': clean_text(metadata.get('description', '')),
-            'author': clean_text(metadata.get('author', '')),
-            'date': clean_text(metadata.get('date', '')),
-            'header_image': metadata.get('header_image', ''),
-            'site_name': clean_text(metadata.get('site_name', '')),
-            'url': url
-        }
-        
-        return cleaned_data
+        # メタデータとコンテンツの抽出（SCRAPER_PARSE_WORKERS > 0 ならプロセスプールで実行）
+        return _build_result(url, response)
             
-    except requests.RequestException as e:
-        raise Exception(f"ネットワークエラー: {str(e)}")
+    except (httpx.HTTPError, CircuitOpenError) as e:
+        raise Exception(f"ネットワークエラー: {str(e)}") from e
+    except Exception as e:
+        logging.error(f"Scraping error: {str(e)}")
+        logging.error(f"Traceback: {traceback.format_exc()}")
+        raise Exception(f"スクレイピングエラー: {str(e)}")
+
+async def scrape_url_async(url: str) -> Dict[str, str]:
+    """scrape_url for asyncio callers; parsing runs in the loop's default executor"""
+    try:
+        response = await fetch_engine.fetch_async(url)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, _build_result, url, response)
+    except (httpx.HTTPError, CircuitOpenError) as e:
+        raise Exception(f"ネットワークエラー: {str(e)}") from e
     except Exception as e:
         logging.error(f"Scraping error: {str(e)}")
         logging.error(f"Traceback: {traceback.format_exc()}")
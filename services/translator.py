@@ -1,15 +1,180 @@
-import requests
-from typing import Optional
 import os
+import time
+import logging
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
-def translate_text(text: str) -> Optional[str]:
+from services.rate_limit import RateLimiter
+
+DEFAULT_TARGET_LANG = 'ja'
+
+
+class TranslationProvider(ABC):
     """
-    Translate text from detected language to Japanese
-    Using a mock implementation - replace with actual translation service
+    Backend interface for batch translation.
+    Subclasses declare their request limits and implement translate_batch;
+    translate_segments takes care of splitting, packing and concurrency.
+    The rate limit and max_concurrency apply to all callers sharing the provider.
     """
-    try:
+    name = 'base'
+    max_segments_per_request = 50
+    max_chars_per_request = 5000
+    requests_per_second = 5.0
+    max_concurrency = 4
+
+    def __init__(self):
+        self.limiter = RateLimiter.per_second(self.requests_per_second)
+        self.semaphore = threading.BoundedSemaphore(max(1, self.max_concurrency))
+
+    @abstractmethod
+    def translate_batch(self, segments: List[str], target_lang: str) -> List[str]:
+        """Translate every segment in one request; must return one result per segment, in order"""
+
+    def merge_pieces(self, pieces: List[str]) -> str:
+        """Join the translated pieces of a segment that was split across requests"""
+        return ''.join(pieces)
+
+
+class StubTranslationProvider(TranslationProvider):
+    """
+    Deterministic local provider for development and offline benchmarks.
+    Sleeps latency + per-character cost per request to mimic a remote service.
+    Text is echoed back and marked once per original segment.
+    """
+    name = 'stub'
+
+    def __init__(self,
+                 latency_ms: Optional[float] = None,
+                 per_kchar_ms: Optional[float] = None,
+                 requests_per_second: Optional[float] = None,
+                 max_concurrency: Optional[int] = None):
+        self.latency_ms = latency_ms if latency_ms is not None \
+            else float(os.environ.get('TRANSLATION_STUB_LATENCY_MS', '0'))
+        self.per_kchar_ms = per_kchar_ms if per_kchar_ms is not None \
+            else float(os.environ.get('TRANSLATION_STUB_PER_KCHAR_MS', '0'))
+        if requests_per_second is not None:
+            self.requests_per_second = requests_per_second
+        if max_concurrency is not None:
+            self.max_concurrency = max_concurrency
+        super().__init__()
+
+    def translate_batch(self, segments: List[str], target_lang: str) -> List[str]:
+        delay = self.latency_ms + self.per_kchar_ms * sum(len(segment) for segment in segments) / 1000
+        if delay > 0:
+            time.sleep(delay / 1000)
         # Mock translation - replace with actual translation API
-        translated = f"[Translated] {text}"
-        return translated
+        return list(segments)
+
+    def merge_pieces(self, pieces: List[str]) -> str:
+        # 分割された本文でもマーカーは先頭に1回だけ付ける
+        return f"[Translated] {''.join(pieces)}"
+
+
+PROVIDERS = {
+    StubTranslationProvider.name: StubTranslationProvider
+}
+
+_provider: Optional[TranslationProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_provider() -> TranslationProvider:
+    """Provider selected by TRANSLATION_PROVIDER (default: stub), created once per process"""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            name = os.environ.get('TRANSLATION_PROVIDER', StubTranslationProvider.name)
+            if name not in PROVIDERS:
+                raise ValueError(f"不明な翻訳プロバイダー: {name}")
+            _provider = PROVIDERS[name]()
+        return _provider
+
+
+def _split_segment(text: str, limit: int) -> List[str]:
+    """Split text that exceeds one request, preferring line and tag boundaries"""
+    pieces = []
+    while len(text) > limit:
+        cut = max(text.rfind('\n', 0, limit), text.rfind('>', 0, limit))
+        cut = cut + 1 if cut > 0 else limit
+        pieces.append(text[:cut])
+        text = text[cut:]
+    if text:
+        pieces.append(text)
+    return pieces
+
+
+def _plan_requests(pieces: List[str], provider: TranslationProvider) -> List[List[int]]:
+    """Greedily pack piece indices into requests within the provider's segment and size limits"""
+    requests = []
+    current: List[int] = []
+    size = 0
+    for index, piece in enumerate(pieces):
+        if current and (len(current) >= provider.max_segments_per_request
+                        or size + len(piece) > provider.max_chars_per_request):
+            requests.append(current)
+            current, size = [], 0
+        current.append(index)
+        size += len(piece)
+    if current:
+        requests.append(current)
+    return requests
+
+
+def translate_segments(segments: List[Optional[str]],
+                       target_lang: str = DEFAULT_TARGET_LANG,
+                       provider: Optional[TranslationProvider] = None) -> List[Optional[str]]:
+    """
+    Translate many segments with as few provider requests as its limits allow,
+    running requests concurrently under its rate limit. Empty segments are returned as-is.
+    """
+    provider = provider or get_provider()
+
+    # 長すぎるセグメントは分割し、翻訳後に元の順序で結合する
+    pieces: List[str] = []
+    owners: List[Tuple[int, int]] = []
+    for segment_index, segment in enumerate(segments):
+        if not segment:
+            continue
+        for piece in _split_segment(segment, provider.max_chars_per_request):
+            owners.append((segment_index, len(pieces)))
+            pieces.append(piece)
+
+    translated_pieces: List[Optional[str]] = [None] * len(pieces)
+
+    def run(indices: List[int]) -> None:
+        # 同じプロバイダーを使う他のリクエストと合わせて max_concurrency を守る
+        with provider.semaphore:
+            provider.limiter.wait()
+            results = provider.translate_batch([pieces[i] for i in indices], target_lang)
+        if len(results) != len(indices):
+            raise Exception(f"翻訳結果の件数が一致しません ({len(results)} != {len(indices)})")
+        for i, result in zip(indices, results):
+            translated_pieces[i] = result
+
+    try:
+        plan = _plan_requests(pieces, provider)
+        if len(plan) == 1:
+            run(plan[0])
+        elif plan:
+            with ThreadPoolExecutor(max_workers=min(provider.max_concurrency, len(plan))) as executor:
+                list(executor.map(run, plan))
     except Exception as e:
+        logging.error(f"Translation error ({provider.name}): {str(e)}")
         raise Exception(f"Translation failed: {str(e)}")
+
+    translated: Dict[int, List[str]] = {}
+    for segment_index, piece_index in owners:
+        translated.setdefault(segment_index, []).append(translated_pieces[piece_index])
+    return [
+        provider.merge_pieces(translated[i]) if i in translated else segment
+        for i, segment in enumerate(segments)
+    ]
+
+
+def translate_text(text: str) -> Optional[str]:
+    """
+    Translate text from detected language to Japanese
+    """
+    return translate_segments([text])[0]
@@ -1,6 +1,9 @@
 'use strict';
 
 let currentContentId = null;
+// Lazy loading state for the remaining content chunks
+let chunkState = null;
+let chunkObserver = null;
 const loadingModal = new bootstrap.Modal(document.getElementById('loadingModal'));
 
 // Initialize event listeners
@@ -34,6 +37,16 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
+    const chunkRetryButton = document.getElementById('chunkRetryButton');
+    if (chunkRetryButton) {
+        chunkRetryButton.addEventListener('click', () => {
+            if (!chunkState) return;
+            chunkState.failed = false;
+            setChunkRetryVisible(false);
+            loadNextChunk();
+        });
+    }
+
     // Fetch initial Notion properties
     fetchNotionProperties();
 });
@@ -166,7 +179,7 @@ async function fetchNotionProperties() {
     }
 }
 
-// Update preview content
+// Update preview content (only the first chunk is included in the scrape response)
 function updatePreview(data) {
     const originalContent = document.getElementById('originalContent');
     if (originalContent) {
@@ -176,6 +189,86 @@ function updatePreview(data) {
         if (titleElem) titleElem.textContent = data.title;
         if (bodyElem) bodyElem.innerHTML = data.content;
     }
+    setupChunkLoading(data.id, data.chunk_count || 1);
+}
+
+// Load the remaining chunks as the sentinel below the body scrolls into view
+function setupChunkLoading(contentId, chunkCount) {
+    const sentinel = document.getElementById('contentSentinel');
+    if (chunkObserver) {
+        chunkObserver.disconnect();
+        chunkObserver = null;
+    }
+    chunkState = { contentId, next: 1, total: chunkCount, loading: false, failed: false };
+    setChunkRetryVisible(false);
+
+    if (!sentinel || chunkCount <= 1) {
+        if (sentinel) sentinel.classList.add('d-none');
+        return;
+    }
+
+    sentinel.classList.remove('d-none');
+    chunkObserver = new IntersectionObserver((entries) => {
+        if (entries.some(entry => entry.isIntersecting)) {
+            loadNextChunk();
+        }
+    }, { rootMargin: '600px 0px' });
+    chunkObserver.observe(sentinel);
+}
+
+// Swap the sentinel between the loading indicator and the retry button
+function setChunkRetryVisible(visible) {
+    const loading = document.getElementById('chunkLoading');
+    const retry = document.getElementById('chunkRetry');
+    if (loading) loading.classList.toggle('d-none', visible);
+    if (retry) retry.classList.toggle('d-none', !visible);
+}
+
+async function loadNextChunk() {
+    const state = chunkState;
+    // After a failure, wait for the retry button instead of refetching on every scroll
+    if (!state || state.loading || state.failed || state.next >= state.total) return;
+
+    let loaded = false;
+    state.loading = true;
+    try {
+        const response = await fetch(`/api/content/${state.contentId}/chunks/${state.next}`);
+        const data = await response.json();
+
+        if (!response.ok || data.status === 'error') {
+            throw new Error(data.message || 'Failed to load content');
+        }
+        // Ignore responses that arrive after another URL was scraped
+        if (state !== chunkState) return;
+
+        const bodyElem = document.querySelector('#originalContent .content-body');
+        if (bodyElem) bodyElem.insertAdjacentHTML('beforeend', data.data.html);
+        state.next += 1;
+        loaded = true;
+
+        if (state.next >= state.total) {
+            if (chunkObserver) chunkObserver.disconnect();
+            document.getElementById('contentSentinel').classList.add('d-none');
+        }
+    } catch (error) {
+        console.error('Error loading content chunk:', error);
+        if (state === chunkState) {
+            state.failed = true;
+            setChunkRetryVisible(true);
+            showError('本文の読み込みに失敗しました: ' + error.message);
+        }
+    } finally {
+        state.loading = false;
+    }
+
+    // Keep loading while the sentinel is still visible (e.g. on tall screens)
+    const sentinel = document.getElementById('contentSentinel');
+    if (loaded && state === chunkState && sentinel && state.next < state.total) {
+        const rect = sentinel.getBoundingClientRect();
+        if (rect.top < window.innerHeight + 600) {
+            loadNextChunk();
+        }
+    }
 }
 
 function updateTranslatedContent(data) {